@@ -1,4 +1,7 @@
+import os
 import re
+import hashlib
+from functools import lru_cache
 
 ATS_SECTIONS = [
     "contact", "education", "skills", "experience", "project", "certificat", "about"
@@ -12,34 +15,110 @@ ATS_BAD_FORMATTING = [
 
 BULLET_SYMBOLS = ['•', '◦', '●', '○', '▪', '–', '—']
 
-def ats_section_coverage(resume_text):
-    found, missing = [], []
+# Resume ATS profiles kept in memory; the least recently used are dropped first
+ATS_PROFILE_CACHE_SIZE = int(os.getenv("ATS_PROFILE_CACHE_SIZE", 1024))
+
+def _pattern_literals(regex):
+    """
+    The plain strings a formatting pattern matches: its alternatives split on unescaped "|" and
+    unescaped. Patterns with any other regex syntax can't go into the literal scanner.
+    """
+    literals = [re.sub(r"\\(.)", r"\1", alternative) for alternative in re.split(r"(?<!\\)\|", regex)]
+    if re.search(r"(?<!\\)[.^$*+?()\[\]]", regex) or not all(re.fullmatch(regex, literal) for literal in literals):
+        raise ValueError(f"ATS_BAD_FORMATTING pattern {regex!r} is not an alternation of plain literals")
+    return literals
+
+def _compile_scanner():
+    """
+    Every section, formatting and bullet check as one alternation of plain literals (no groups,
+    so the regex engine can skip ahead to candidate characters), run over the lowercased resume.
+    Returns (regex, literal -> (kind, check)).
+    """
+    checks = {sec: ("sections", sec) for sec in ATS_SECTIONS}
+    for regex in ATS_BAD_FORMATTING:
+        checks.update({literal: ("formatting", regex) for literal in _pattern_literals(regex)})
+    checks.update({b: ("bullets", b) for b in BULLET_SYMBOLS})
+    # Longest first, so no literal can shadow a longer one starting at the same position
+    literals = sorted(checks, key=len, reverse=True)
+    return re.compile("|".join(re.escape(literal) for literal in literals)), checks
+
+_SCANNER, _SCANNER_CHECKS = _compile_scanner()
+
+def ats_scan(resume_text):
+    """
+    Resume-only ATS analysis in one pass: sections found/missing, formatting issues (same values
+    as ats_section_coverage / ats_bad_formatting_score), the position of every match and counts.
+    """
+    positions = {"sections": {}, "formatting": {}, "bullets": {}}
     lower_text = resume_text.lower()
-    for sec in ATS_SECTIONS:
-        if re.search(sec, lower_text):
-            found.append(sec)
-        else:
-            missing.append(sec)
-    return found, missing
+    if len(lower_text) != len(resume_text):
+        # A few characters lowercase to two; leave those as they are so positions line up with the original text
+        lower_text = "".join(c if len(c.lower()) != 1 else c.lower() for c in resume_text)
+    search, pos = _SCANNER.search, 0
+    # Restart one character after each match start rather than at its end, so overlapping occurrences are all found
+    while True:
+        match = search(lower_text, pos)
+        if match is None:
+            break
+        pos = match.start()
+        kind, check = _SCANNER_CHECKS[match.group()]
+        # Formatting patterns are case-sensitive (only sections ignore case)
+        if kind == "sections" or resume_text.startswith(match.group(), pos):
+            positions[kind].setdefault(check, []).append(pos)
+        pos += 1
+    sections_found = [sec for sec in ATS_SECTIONS if sec in positions["sections"]]
+    sections_missing = [sec for sec in ATS_SECTIONS if sec not in positions["sections"]]
+    format_issues = [regex for regex in ATS_BAD_FORMATTING if regex in positions["formatting"]]
+    format_issues += [f"Bullet symbol: {repr(b)}" for b in BULLET_SYMBOLS if b in positions["bullets"]]
+    return {
+        "sections_found": sections_found,
+        "sections_missing": sections_missing,
+        "format_issues": format_issues,
+        "format_suggestions": resume_format_suggestions(sections_missing, format_issues),
+        "positions": positions,
+        "counts": {kind: {check: len(found) for check, found in matches.items()} for kind, matches in positions.items()},
+    }
+
+def ats_resume_profile(resume_text, resume_hash=None):
+    """ats_scan result for a resume, computed once per resume hash (the file hash, or a hash of the text)."""
+    if resume_hash is None:
+        resume_hash = hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+    return _cached_profile(resume_hash, resume_text)
+
+# The profile depends only on the resume, so it's shared by all of its JD pairs
+@lru_cache(maxsize=ATS_PROFILE_CACHE_SIZE)
+def _cached_profile(resume_hash, resume_text):
+    return ats_scan(resume_text)
+
+def ats_profile_corpus(resume_docs):
+    """
+    Batch mode: the ATS profile of every resume artifact (document_utils.build_document), keyed by
+    file hash and scanned once per distinct file. Keep the result; it doesn't go through the LRU cache.
+    """
+    profiles = {}
+    for doc in resume_docs:
+        if doc["file_hash"] not in profiles:
+            profiles[doc["file_hash"]] = ats_scan(doc["clean_text"])
+    return profiles
+
+def ats_section_coverage(resume_text):
+    profile = ats_resume_profile(resume_text)
+    return profile["sections_found"], profile["sections_missing"]
 
 def ats_bad_formatting_score(resume_text):
-    issues = []
-    for regex in ATS_BAD_FORMATTING:
-        if re.search(regex, resume_text):
-            issues.append(regex)
-    for b in BULLET_SYMBOLS:
-        if b in resume_text:
-            issues.append(f"Bullet symbol: {repr(b)}")
-    return issues
+    return ats_resume_profile(resume_text)["format_issues"]
 
 def ats_keyword_score(matched_skills, jd_skills):
     if len(jd_skills) == 0:
         return 0.0
     return len(matched_skills) / len(jd_skills)
 
-def ats_optimization_report(resume_clean, matched_skills, jd_skills):
-    sections_found, sections_missing = ats_section_coverage(resume_clean)
-    bad_format_issues = ats_bad_formatting_score(resume_clean)
+def ats_optimization_report(resume_clean, matched_skills, jd_skills, profile=None):
+    """Per-pair ATS report; only the keyword coverage depends on the JD, the rest comes from the resume's profile."""
+    if profile is None:
+        profile = ats_resume_profile(resume_clean)
+    sections_found, sections_missing = profile["sections_found"], profile["sections_missing"]
+    bad_format_issues = profile["format_issues"]
     keyword_score = ats_keyword_score(matched_skills, jd_skills)
     composite = (keyword_score * 0.6) + (len(sections_found) / len(ATS_SECTIONS)) * 0.3 - (len(bad_format_issues) * 0.1)
     composite = max(min(composite, 1.0), 0.0)
@@ -0,0 +1,118 @@
+import os
+import json
+import hashlib
+
+# Bump when a change to scoring, prompts or reports should invalidate completed pairs
+PIPELINE_VERSION = "3"
+
+def pair_key(resume_doc, jd_doc, model, embedding_model, options=None, pipeline_version=PIPELINE_VERSION):
+    """
+    Identity of one pair's result: both files (path and content hash), LLM and embedding model,
+    run options that change the output (e.g. which reports are rendered) and pipeline version.
+    The path is included because each file gets its own row and reports.
+    """
+    material = json.dumps(
+        {"resume": [resume_doc["path"], resume_doc["file_hash"]], "jd": [jd_doc["path"], jd_doc["file_hash"]],
+         "model": model, "embedding_model": embedding_model, "options": options or {}, "pipeline": pipeline_version},
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def _sync(f):
+    """Push buffered writes to disk so they survive a crash or power loss."""
+    f.flush()
+    os.fsync(f.fileno())
+
+class BatchCheckpoint:
+    """
+    Resumable batch output. Every finished row is appended to the results store (results_store.ResultsStore)
+    as soon as it's ready, and each fully analyzed pair is committed and recorded in a JSON-lines
+    manifest (pair key -> status and row). A restarted run rebuilds the store from the manifest and
+    skips the pairs already done, so only new or changed resume/JD files, and pairs that failed
+    (status "failed", e.g. an LLM timeout), are processed.
+    """
+
+    def __init__(self, store, manifest_path=None):
+        self.store = store
+        self.manifest_path = manifest_path or os.path.splitext(store.path)[0] + ".manifest.jsonl"
+        self.entries = self._load()
+        self.resumed = 0
+        self.written = 0
+        self.failed = 0
+        self._manifest_file = None
+
+    def _load(self):
+        """Latest manifest entry per pair key; a torn last line from a crash is ignored."""
+        entries = {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    entries[entry["key"]] = entry
+        except OSError:
+            pass
+        return entries
+
+    def reset(self):
+        """Forget all progress (a full re-run)."""
+        self.entries = {}
+
+    def start(self, keys):
+        """
+        Begin a run over the given pair keys: refill the store with the completed rows of those
+        pairs (dropping rows of changed or removed files), compact the manifest, open it for appending.
+        """
+        keys = set(keys)
+        done = [entry for key, entry in self.entries.items() if key in keys and entry["status"] == "done"]
+        self.resumed = len(done)
+        self.store.replace_all(entry["row"] for entry in done)
+
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, default=str) + "\n")
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest_file = open(self.manifest_path, "a", encoding="utf-8")
+
+    def is_done(self, key):
+        entry = self.entries.get(key)
+        return entry is not None and entry["status"] == "done"
+
+    def append_row(self, row, commit=False):
+        """Append a row to the store without marking any pair as done (committed in batches unless commit=True)."""
+        self.store.append(row, commit=commit)
+        self.written += 1
+
+    def record(self, key, row, status="done", **info):
+        """
+        Append and commit a finished pair's row, then record its status in the manifest (info is stored
+        alongside). Only "done" pairs are skipped by a restarted run; any other status is run again.
+        """
+        self.append_row(row, commit=True)
+        if status != "done":
+            self.failed += 1
+        entry = {"key": key, "status": status, "row": row, **info}
+        self._manifest_file.write(json.dumps(entry, default=str) + "\n")
+        _sync(self._manifest_file)
+        self.entries[key] = entry
+
+    def close(self):
+        self.store.commit()
+        if self._manifest_file is not None:
+            self._manifest_file.close()
+        self._manifest_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def format_stats(self):
+        stats = f"Batch checkpoint: {self.resumed} pairs resumed from {self.manifest_path}, {self.written} rows written"
+        if self.failed:
+            stats += f", {self.failed} failed pairs to retry on the next run"
+        return stats
@@ -1,69 +1,107 @@
+import os
+import sys
+import html
+import argparse
 import streamlit as st
-import pandas as pd
+from pair_reports import load_analysis, render_report
+from dashboard_data import load_dashboard_data, page, page_count, JDS_PER_PAGE, MAX_TOP_N
+from rank_candidates import default_results_paths
 
 st.set_page_config(layout="wide")
 st.title("Resume Reviewer Batch Dashboard")
 
-df = pd.read_csv("outputs/batch_matrix.csv")
-# Ensure all object columns are strings for display
-for col in df.columns:
-    if df[col].dtype == "object":
-        df[col] = df[col].apply(lambda x: str(x))
+# streamlit run dashboard.py -- --output-dir <dir>: the batch's output directory (main.py --output-dir)
+parser = argparse.ArgumentParser(description="Batch results dashboard.")
+parser.add_argument("--output-dir", default="outputs", help="batch output directory (default: %(default)s)")
+parser.add_argument("--results", nargs="+",
+                    help="results databases (default: the shards in <output-dir>, or its batch_results.sqlite3)")
+args, _ = parser.parse_known_args(sys.argv[1:])
+results_paths = args.results or default_results_paths(args.output_dir)
+if not results_paths:
+    st.error(f"No batch results in {args.output_dir}; run main.py first or pass --results.")
+    st.stop()
 
-st.subheader("Full Candidate-JD Matrix")
-st.dataframe(df, width='stretch')
+# Cached across reruns; reloaded only when the results files change
+data = load_dashboard_data(results_paths)
+
+def split_lines(text):
+    text = str(text or "")
+    return text.split("\\n") if "\\n" in text else text.split("\n")
 
 with st.sidebar:
     st.header("Filter Options")
-    jd_selected = st.selectbox("Select JD", ["ALL"] + list(df["jd_filename"].unique()))
-    candidate_selected = st.selectbox("Select Candidate", ["ALL"] + list(df["resume_filename"].unique()))
-    score_choice = st.selectbox("Ranking Score", ["overall_score", "ats_composite_score"])
-    top_n = st.slider("Top Candidates Number", 1, 10, 3)
+    jd_selected = st.selectbox("Select JD", ["ALL"] + data.jd_names)
+    candidate_selected = st.selectbox("Select Candidate", ["ALL"] + data.resume_names)
+    score_choice = st.selectbox("Ranking Score", ["overall_score", "ats_composite_score", "composite_score"])
+    weights = None
+    if score_choice == "composite_score":
+        # Weighted mean of the score columns (rank_candidates.composite_score)
+        weights = {
+            "overall_score": st.slider("Overall weight", 0.0, 1.0, 0.5),
+            "skills_score": st.slider("Skills weight", 0.0, 1.0, 0.0),
+            "experience_score": st.slider("Experience weight", 0.0, 1.0, 0.0),
+            "ats_composite_score": st.slider("ATS weight", 0.0, 1.0, 0.5),
+        }
+        weights = {column: weight for column, weight in weights.items() if weight > 0} or {"overall_score": 1.0}
+    top_n = st.slider("Top Candidates Number", 1, MAX_TOP_N, 3)
 
-filtered = df.copy()
-if jd_selected != "ALL":
-    filtered = filtered[filtered["jd_filename"] == jd_selected]
-if candidate_selected != "ALL":
-    filtered = filtered[filtered["resume_filename"] == candidate_selected]
+jd_filter = None if jd_selected == "ALL" else jd_selected
+candidate_filter = None if candidate_selected == "ALL" else candidate_selected
+filtered = data.filtered(jd_filter, candidate_filter)
 
-st.subheader("Filtered Results")
-st.dataframe(filtered, width='stretch')
+st.subheader(f"Candidate-JD Results ({len(filtered)} pairs)")
+results_page = st.number_input("Page", 1, page_count(len(filtered)), 1, key="results_page")
+st.dataframe(page(filtered, results_page), width='stretch')
 
 st.markdown("---")
 st.markdown("### Top Candidates per JD")
 
-for jd in filtered["jd_filename"].unique():
-    st.markdown(f"<h4><u>JD: {jd}</u></h4>", unsafe_allow_html=True)
-    sub = filtered[filtered["jd_filename"] == jd]
-    best = sub.sort_values(score_choice, ascending=False).head(top_n).copy()
-    if "report_path" in best.columns:
-        best["PDF Report"] = [
-            f"[Download]({row['report_path']})" if isinstance(row["report_path"], str) and "pdf" in row["report_path"] else "" 
-            for _, row in best.iterrows()
-        ]
-    display_cols = ["resume_filename", score_choice, "ats_composite_score", "matched_skills", "PDF Report"]
+jds = data.jd_names if jd_filter is None else [jd_filter]
+jd_page = st.number_input("JD page", 1, page_count(len(jds), JDS_PER_PAGE), 1, key="jd_page")
+
+for jd in jds[(jd_page - 1) * JDS_PER_PAGE:jd_page * JDS_PER_PAGE]:
+    best = data.top_n(jd, score_choice, top_n, resume_filename=candidate_filter, weights=weights)
+    if best.empty:
+        continue
+    st.markdown(f"<h4><u>JD: {html.escape(jd)}</u></h4>", unsafe_allow_html=True)
+    pairs = list(zip(best["results_path"], best["pair_id"]))
+    best = best.join(data.details(pairs, ["matched_skills", "report_path", "analysis_path"]), on=["results_path", "pair_id"])
+    best["PDF Report"] = [
+        f"[Download]({path})" if isinstance(path, str) and "pdf" in path else "" for path in best["report_path"]
+    ]
+    display_cols = ["rank", "resume_filename", score_choice, "ats_composite_score", "matched_skills", "PDF Report"]
     display_cols = list(dict.fromkeys(display_cols))
     st.dataframe(
         best[display_cols],
         width='stretch'
     )
 
-    # Format Suggestions Section
-    if "resume_format_suggestions" in best.columns:
-        for _, row in best.iterrows():
-            st.markdown(f"<span style='color:#dc2626;font-weight:bold'>🛠️ Format Suggestions:</span>", unsafe_allow_html=True)
-            suggs = row['resume_format_suggestions'].split("\\n") if "\\n" in row['resume_format_suggestions'] else row['resume_format_suggestions'].split("\n")
-            for sugg in suggs:
-                st.markdown(f"<div style='margin-left: 20px; color:#2563eb;'>• {sugg.strip()}</div>", unsafe_allow_html=True)
+    for row in best.itertuples():
+        # Reports that were deferred or skipped by the score threshold are rendered on request
+        # (a missing report_path is None or NaN, depending on the rest of the column)
+        if not (isinstance(row.report_path, str) and row.report_path) and row.analysis_path and os.path.exists(row.analysis_path):
+            if st.button(f"Render report for {row.resume_filename}", key=f"render::{jd}::{row.resume_filename}"):
+                report = render_report(load_analysis(row.analysis_path), out_prefix=args.output_dir)
+                data.set_report_path(row.results_path, row.pair_id, report)
+                st.rerun()
 
-    # Interview Questions Section
-    if "interview_questions" in best.columns:
-        for _, row in best.iterrows():
-            st.write("")
-            with st.expander(f"Interview Questions for {row['resume_filename']}", expanded=False):
-                questions = row["interview_questions"].split("\\n") if "\\n" in row["interview_questions"] else row["interview_questions"].split("\n")
-                for q in questions:
-                    q_clean = q.replace("**", "")  # Remove extra markdown bold
-                    st.markdown(f"<div style='margin-left: 20px;'>• {q_clean.strip()}</div>", unsafe_allow_html=True)
-            st.markdown("---")
+        # Suggestions and questions are only fetched once the toggle is switched on
+        if st.toggle(f"Format suggestions and interview questions for {row.resume_filename}",
+                     key=f"details::{jd}::{row.resume_filename}"):
+            details = data.details(
+                [(row.results_path, row.pair_id)], ["resume_format_suggestions", "interview_questions"]
+            ).iloc[0]
+            suggestions = "".join(
+                f"<div style='margin-left: 20px; color:#2563eb;'>• {html.escape(sugg.strip())}</div>"
+                for sugg in split_lines(details["resume_format_suggestions"])
+            )
+            st.markdown(
+                f"<span style='color:#dc2626;font-weight:bold'>🛠️ Format Suggestions:</span>{suggestions}",
+                unsafe_allow_html=True,
+            )
+            questions = "".join(
+                f"<div style='margin-left: 20px;'>• {html.escape(q.replace('**', '').strip())}</div>"
+                for q in split_lines(details["interview_questions"])
+            )
+            st.markdown(f"<b>Interview Questions:</b>{questions}", unsafe_allow_html=True)
     st.markdown("---")
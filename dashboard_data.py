@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import pandas as pd
+from results_store import ResultsStore
+from rank_candidates import rank_candidates, rank_partitions, default_results_paths
+
+# Rows per page of the results table, and JD sections per page of the top-candidates view
+PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", 200))
+JDS_PER_PAGE = int(os.getenv("DASHBOARD_JDS_PER_PAGE", 10))
+# Score columns that get a precomputed per-JD ranking when the data is loaded (others on first use),
+# and how many candidates per JD those rankings keep (the top-candidates slider maximum)
+RANK_COLUMNS = ["overall_score", "ats_composite_score"]
+MAX_TOP_N = 10
+
+# results paths -> (file signature, DashboardData); survives Streamlit reruns since the module stays imported
+_cache = {}
+
+def _signature(path):
+    """Modification time and size of the database, its WAL and the score snapshot: changes whenever results are written."""
+    signature = []
+    for file_path in (path, path + "-wal", os.path.splitext(path)[0] + ".scores.npz"):
+        try:
+            stat = os.stat(file_path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def page_count(num_rows, page_size=PAGE_SIZE):
+    return max(1, -(-num_rows // page_size))
+
+def page(frame, number, page_size=PAGE_SIZE):
+    """Rows of the 1-based page number."""
+    start = (number - 1) * page_size
+    return frame.iloc[start:start + page_size]
+
+class DashboardData:
+    """
+    Scores of one or more results stores (e.g. the shards of a sharded batch), loaded once, with
+    per-JD rankings (rank_candidates.rank_partitions) precomputed so that top-N lookups are slices.
+    Pairs are identified by (results_path, pair_id); their text columns are fetched when needed and memoized.
+    """
+
+    def __init__(self, stores):
+        self.stores = {store.path: store for store in stores}
+        scores = pd.concat(
+            [store.load_scores().assign(results_path=store.path) for store in stores], ignore_index=True
+        )
+        for column in ("resume_filename", "jd_filename", "results_path"):
+            scores[column] = scores[column].astype("category")
+        self.scores = scores
+        self.jd_names = list(scores["jd_filename"].cat.categories)
+        self.resume_names = list(scores["resume_filename"].cat.categories)
+        self._jd_codes = scores["jd_filename"].cat.codes.to_numpy()
+        self._resume_codes = scores["resume_filename"].cat.codes.to_numpy()
+        self._jd_index = {name: code for code, name in enumerate(self.jd_names)}
+        self._resume_index = {name: code for code, name in enumerate(self.resume_names)}
+        self._rankings = {column: self._ranking(score_col=column) for column in RANK_COLUMNS}
+        self._weighted = None  # (weights, ranking) of the last weighted ranking asked for
+        self._details = {}
+
+    def _ranking(self, **ranking):
+        """The top MAX_TOP_N candidates of every JD, plus each JD's row positions in that frame."""
+        parts = (part for _, part in self.scores.groupby("results_path", sort=False, observed=True))
+        ranked = rank_partitions(parts, top_n=MAX_TOP_N, **ranking).reset_index(drop=True)
+        return ranked, ranked.groupby("jd_filename", sort=False, observed=True).indices
+
+    def filtered(self, jd_filename=None, resume_filename=None):
+        mask = np.ones(len(self.scores), dtype=bool)
+        if jd_filename is not None:
+            mask &= self._jd_codes == self._jd_index[jd_filename]
+        if resume_filename is not None:
+            mask &= self._resume_codes == self._resume_index[resume_filename]
+        return self.scores[mask]
+
+    def top_n(self, jd_filename, score_col="overall_score", n=3, resume_filename=None, weights=None):
+        """
+        The JD's n best pairs by score_col, or by the weighted mean of score columns stored as
+        score_col when weights are given; optionally only those of one resume.
+        """
+        if resume_filename is not None:
+            return rank_candidates(self.filtered(jd_filename, resume_filename), score_col=score_col, weights=weights, top_n=n)
+        if weights:
+            key = tuple(sorted(weights.items()))
+            if self._weighted is None or self._weighted[0] != key:
+                self._weighted = (key, self._ranking(score_col=score_col, weights=weights))
+            ranked, positions = self._weighted[1]
+        else:
+            if score_col not in self._rankings:
+                self._rankings[score_col] = self._ranking(score_col=score_col)
+            ranked, positions = self._rankings[score_col]
+        return ranked.iloc[positions.get(jd_filename, [])[:n]]
+
+    def details(self, pairs, columns):
+        """
+        Text columns for the given (results_path, pair_id) pairs, indexed by both;
+        only pairs not seen before hit the database.
+        """
+        columns = tuple(columns)
+        pairs = [(str(path), int(pair_id)) for path, pair_id in pairs]
+        missing = {}
+        for path, pair_id in pairs:
+            if (path, pair_id, columns) not in self._details:
+                missing.setdefault(path, []).append(pair_id)
+        for path, pair_ids in missing.items():
+            loaded = self.stores[path].load_details(pair_ids, columns)
+            for pair_id, values in zip(loaded.index, loaded.itertuples(index=False, name=None)):
+                self._details[(path, pair_id, columns)] = values
+        empty = (None,) * len(columns)
+        return pd.DataFrame(
+            [self._details.get((path, pair_id, columns), empty) for path, pair_id in pairs],
+            index=pd.MultiIndex.from_tuples(pairs, names=["results_path", "pair_id"]), columns=list(columns),
+        )
+
+    def set_report_path(self, results_path, pair_id, report_path):
+        """Record a report rendered from the dashboard in its results store (opened for writing just for this)."""
+        store = ResultsStore(results_path)
+        try:
+            store.update_details(pair_id, report_path=report_path)
+        finally:
+            store.close(snapshot=False)
+        self._details = {key: values for key, values in self._details.items() if key[:2] != (results_path, int(pair_id))}
+
+def load_dashboard_data(paths=None):
+    """
+    DashboardData for the results at paths (one database, or the shards of a sharded batch;
+    default: rank_candidates.default_results_paths), reloaded only when the files changed since the last call.
+    Databases are opened read-only, so nothing is created for a missing path (FileNotFoundError).
+    """
+    paths = tuple([paths] if isinstance(paths, str) else paths or default_results_paths())
+    if not paths:
+        raise FileNotFoundError("no results databases to show")
+    signature = tuple(_signature(path) for path in paths)
+    entry = _cache.get(paths)
+    if entry is None or entry[0] != signature:
+        stores = entry[1].stores if entry is not None else {}
+        data = DashboardData([stores.get(path) or ResultsStore(path, readonly=True) for path in paths])
+        entry = _cache[paths] = (signature, data)
+    return entry[1]
@@ -0,0 +1,136 @@
+import os
+import numpy as np
+from extraction_cache import extract_document
+from text_cleaner import extract_sections, split_passages
+from embedding_utils import get_embeddings, similarity_matrix, DEFAULT_BATCH_SIZE, DEFAULT_MODEL
+from skill_extractor import extract_skills
+
+TRACKED_SECTIONS = ["skills", "education", "project experience", "experience"]
+
+# Score matrix key -> results column (results_store.SCORE_COLUMNS)
+SCORE_COLUMNS = {
+    "overall": "overall_score",
+    "skills": "skills_score",
+    "education": "education_score",
+    "project experience": "project_score",
+    "experience": "experience_score",
+}
+
+def build_document(path):
+    """
+    Runs the per-document text work once (extraction/OCR, cleaning, sections, skills).
+    Embeddings are filled in afterwards for the whole batch by embed_documents (passage
+    embeddings only for the resumes that get an LLM prompt, by embed_passages).
+    """
+    extracted = extract_document(path)  # served from the extraction cache when the file is unchanged
+    clean_text = extracted["clean_text"]
+    return {
+        "path": path,
+        "filename": os.path.basename(path),
+        "doc_id": os.path.splitext(os.path.basename(path))[0],
+        "file_hash": extracted["file_hash"],
+        "pages_ocr": extracted["pages_ocr"],
+        "clean_text": clean_text,
+        "sections": extract_sections(clean_text),
+        "passages": split_passages(clean_text),
+        "skills": extract_skills(clean_text),
+        "embedding": None,
+        "section_embeddings": {},
+        "passage_embeddings": None,
+    }
+
+def _batch_slots():
+    """(texts, slot): slot(text) adds a text to the batch once and returns its row in the encoded result."""
+    texts, index = [], {}
+    def slot(text):
+        if text not in index:
+            index[text] = len(texts)
+            texts.append(text)
+        return index[text]
+    return texts, slot
+
+def embed_documents(docs, batch_size=DEFAULT_BATCH_SIZE, model_name=DEFAULT_MODEL):
+    """
+    Embeds every whole document and tracked section of docs with a single batched encode call.
+    Identical texts (e.g. a shared boilerplate section) are only encoded once.
+    """
+    texts, slot = _batch_slots()
+    wanted = []
+    for doc in docs:
+        sections = {sec: doc["sections"].get(sec, "") for sec in TRACKED_SECTIONS}
+        wanted.append((
+            slot(doc["clean_text"]),
+            {sec: slot(text) for sec, text in sections.items() if text.strip()},
+        ))
+
+    vectors = get_embeddings(texts, batch_size=batch_size, model_name=model_name)
+
+    for doc, (doc_slot, section_slots) in zip(docs, wanted):
+        doc["embedding"] = vectors[doc_slot]
+        for sec in TRACKED_SECTIONS:
+            if sec in section_slots:
+                doc["section_embeddings"][sec] = vectors[section_slots[sec]]
+            elif doc["clean_text"].strip():
+                # Missing section: fall back to the whole document
+                doc["section_embeddings"][sec] = doc["embedding"]
+            else:
+                doc["section_embeddings"][sec] = None
+    return docs
+
+def embed_passages(docs, batch_size=DEFAULT_BATCH_SIZE, model_name=DEFAULT_MODEL):
+    """
+    Embeds the passages of docs that don't have passage embeddings yet, in one batched encode call.
+    Only needed where passages are ranked for an LLM prompt (prompt_utils.compact_document).
+    """
+    docs = [doc for doc in docs if doc["passage_embeddings"] is None and doc["passages"]]
+    texts, slot = _batch_slots()
+    wanted = [[slot(passage["text"]) for passage in doc["passages"]] for doc in docs]
+    if texts:
+        vectors = get_embeddings(texts, batch_size=batch_size, model_name=model_name)
+        for doc, passage_slots in zip(docs, wanted):
+            doc["passage_embeddings"] = vectors[passage_slots]
+    return docs
+
+def build_documents(paths, label="document", batch_size=DEFAULT_BATCH_SIZE, model_name=DEFAULT_MODEL, pool=None):
+    """
+    Build artifacts for a list of files, each exactly once, then embed them in batches.
+    With a process pool (parallel_utils.worker_pool) the files are preprocessed in the workers;
+    embedding stays here so the texts of all files still go through one batched encode.
+    """
+    docs = []
+    if pool is None:
+        for i, path in enumerate(paths, 1):
+            print(f"[{label} {i}/{len(paths)}] Preprocessing {os.path.basename(path)}")
+            docs.append(build_document(path))
+    else:
+        for i, doc in enumerate(pool.map(build_document, paths), 1):
+            print(f"[{label} {i}/{len(paths)}] Preprocessed {doc['filename']}")
+            docs.append(doc)
+    return embed_documents(docs, batch_size=batch_size, model_name=model_name)
+
+def stack_embeddings(docs, section=None):
+    """Stack one embedding per document; documents without text get a zero row (scores 0)."""
+    vectors = [doc["embedding"] if section is None else doc["section_embeddings"][section] for doc in docs]
+    dim = next((len(v) for v in vectors if v is not None), 0)
+    return np.stack([
+        np.zeros(dim, dtype=np.float32) if v is None else np.asarray(v, dtype=np.float32)
+        for v in vectors
+    ])
+
+def score_documents(resume_docs, jd_docs):
+    """
+    Scores every resume against every JD in one go.
+    Returns a dict of (num_resumes x num_jds) matrices keyed by "overall" and each tracked section.
+    """
+    if not resume_docs or not jd_docs:
+        return {key: np.zeros((len(resume_docs), len(jd_docs)), dtype=np.float32) for key in SCORE_COLUMNS}
+    scores = {"overall": similarity_matrix(stack_embeddings(resume_docs), stack_embeddings(jd_docs))}
+    for sec in TRACKED_SECTIONS:
+        scores[sec] = similarity_matrix(stack_embeddings(resume_docs, sec), stack_embeddings(jd_docs, sec))
+    return scores
+
+def pair_scores(scores, resume_idx, jd_idx):
+    """Pull (overall_score, section_scores) for one pair out of the score_documents matrices."""
+    overall_score = float(scores["overall"][resume_idx, jd_idx])
+    section_scores = {sec: float(scores[sec][resume_idx, jd_idx]) for sec in TRACKED_SECTIONS}
+    return overall_score, section_scores
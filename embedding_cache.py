@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, a single writer is assumed
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "embeddings")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+
+def normalize_text(text):
+    """Whitespace-insensitive form of a text, so re-extracted documents hit the same entry."""
+    return " ".join(text.split())
+
+def cache_key(model_name, text):
+    """Content address of one embedding: (model name, hash of the normalized text)."""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model_name}:{digest}"
+
+class EmbeddingCache:
+    """
+    On-disk embedding store.
+    Each put writes one float32 .npy shard (read back memory-mapped); index.json maps
+    cache keys to (shard, row). When the shards outgrow max_bytes, the least recently
+    used shards are dropped whole.
+    Several processes (e.g. parallel shards of a batch) can share a directory: writes hold a
+    file lock and merge with the index on disk, and .npy files no index entry references are deleted.
+    The index also records which model a requested model name resolved to (see model_alias).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._shards = {}  # shard name -> memory-mapped array
+        self._aliases = {}  # model aliases set by this process, merged into the index on save
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on the cache directory for the duration of an index update."""
+        with open(os.path.join(self.cache_dir, "index.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"entries": {}, "shards": {}}
+
+    def _prune(self, index):
+        """Drop entries whose shard file disappeared, and delete shard files no entry references (lock held)."""
+        index["shards"] = {
+            name: meta for name, meta in index["shards"].items()
+            if os.path.exists(os.path.join(self.cache_dir, name))
+        }
+        index["entries"] = {
+            key: loc for key, loc in index["entries"].items() if loc[0] in index["shards"]
+        }
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npy") and name not in index["shards"]:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+        return index
+
+    def _load_index(self):
+        with self._locked():
+            return self._prune(self._read_index())
+
+    def _save_index(self):
+        """
+        Merge this process's index into the one on disk (other processes may have added or
+        evicted shards since it was read), evict down to max_bytes and write it (lock held).
+        """
+        merged = self._read_index()
+        for name, meta in self._index["shards"].items():
+            if name in merged["shards"]:
+                meta = dict(meta, last_used=max(meta["last_used"], merged["shards"][name]["last_used"]))
+            merged["shards"][name] = meta
+        merged["entries"].update(self._index["entries"])
+        merged["models"] = {**merged.get("models", {}), **self._aliases}
+        self._index = self._prune(merged)
+        self.evict()
+        self._write_index()
+
+    def _write_index(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _shard(self, name):
+        if name not in self._shards:
+            self._shards[name] = np.load(os.path.join(self.cache_dir, name), mmap_mode="r")
+        return self._shards[name]
+
+    def get_many(self, model_name, texts):
+        """Return a list with the cached vector for each text, or None where it is not cached."""
+        now = time.time()
+        results = []
+        for text in texts:
+            loc = self._index["entries"].get(cache_key(model_name, text))
+            if loc is None:
+                self.misses += 1
+                results.append(None)
+                continue
+            shard_name, row = loc
+            try:
+                results.append(np.array(self._shard(shard_name)[row], dtype=np.float32))
+            except (OSError, ValueError, IndexError):
+                # Shard vanished or is corrupt: treat as a miss, it will be re-written
+                self.misses += 1
+                results.append(None)
+                continue
+            self._index["shards"][shard_name]["last_used"] = now
+            self.hits += 1
+        return results
+
+    def model_alias(self, model_name):
+        """The model a requested model name was last resolved to (e.g. after a fallback), else the name itself."""
+        return self._index.get("models", {}).get(model_name, model_name)
+
+    def set_model_alias(self, model_name, resolved_name):
+        """Record which model model_name resolved to, so later runs look its vectors up under that name."""
+        if self.model_alias(model_name) == resolved_name:
+            return
+        with self._locked():
+            self._aliases[model_name] = resolved_name
+            self._save_index()
+
+    def put_many(self, model_name, texts, vectors):
+        """Store freshly computed vectors as one new shard, then evict down to max_bytes."""
+        if not texts:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        shard_name = f"{uuid.uuid4().hex}.npy"
+        # The shard is written under the lock too, so no other process sees it unindexed and deletes it
+        with self._locked():
+            np.save(os.path.join(self.cache_dir, shard_name), vectors)
+            self._index["shards"][shard_name] = {
+                "model": model_name,
+                "bytes": int(vectors.nbytes),
+                "last_used": time.time(),
+            }
+            for row, text in enumerate(texts):
+                self._index["entries"][cache_key(model_name, text)] = [shard_name, row]
+            self._save_index()
+
+    def total_bytes(self):
+        return sum(meta["bytes"] for meta in self._index["shards"].values())
+
+    def evict(self):
+        """Remove least recently used shards until the store fits in max_bytes (called by _save_index, lock held)."""
+        total = self.total_bytes()
+        shards = sorted(self._index["shards"].items(), key=lambda item: item[1]["last_used"])
+        dropped = set()
+        for name, meta in shards:
+            if total <= self.max_bytes:
+                break
+            total -= meta["bytes"]
+            dropped.add(name)
+        if not dropped:
+            return
+        for name in dropped:
+            del self._index["shards"][name]
+            self._shards.pop(name, None)
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+        self._index["entries"] = {
+            key: loc for key, loc in self._index["entries"].items() if loc[0] not in dropped
+        }
+        self.evictions += len(dropped)
+
+    def flush(self):
+        """Persist recency information gathered by lookups."""
+        with self._locked():
+            self._save_index()
+
+    def clear(self):
+        with self._locked():
+            self._shards = {}
+            self._index = self._prune({"entries": {}, "shards": {}})
+            self._write_index()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._index["entries"]),
+            "shards": len(self._index["shards"]),
+            "bytes": self.total_bytes(),
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (
+            f"Embedding cache: {s['hits']} hits, {s['misses']} misses ({s['hit_rate']*100:.1f}% hit rate), "
+            f"{s['entries']} entries in {s['shards']} shards, {s['bytes'] / (1024 * 1024):.1f} MB, "
+            f"{s['evictions']} shards evicted"
+        )
+
+if __name__ == "__main__":
+    print(EmbeddingCache(os.getenv("EMBEDDING_CACHE_DIR", DEFAULT_CACHE_DIR)).format_stats())
@@ -1,26 +1,109 @@
+import os
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from embedding_cache import EmbeddingCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
 
-# Global model instance (loaded once)
-_model = None
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+FALLBACK_MODEL = 'all-MiniLM-L3-v2'
+DEFAULT_BATCH_SIZE = 64
 
-def get_embedding_model():
-    """Get or create the sentence transformer model (singleton pattern)."""
-    global _model
-    if _model is None:
+# Loaded models, one per model name
+_models = {}
+# Requested model name -> name of the model actually loaded (differs after a fallback)
+_resolved_names = {}
+# Shared on-disk embedding cache (created on first use)
+_cache = None
+
+def get_embedding_model(model_name=DEFAULT_MODEL):
+    """Get or create the sentence transformer model for model_name (one instance per name)."""
+    if model_name not in _models:
         try:
-            _model = SentenceTransformer('all-MiniLM-L6-v2')
+            _models[model_name] = SentenceTransformer(model_name)
+            _resolved_names[model_name] = model_name
         except Exception as e:
+            if model_name != DEFAULT_MODEL:
+                raise
             print(f"Error loading main model: {e}")
             print("Using fallback model...")
-            _model = SentenceTransformer('all-MiniLM-L3-v2')
-    return _model
+            _models[model_name] = SentenceTransformer(FALLBACK_MODEL)
+            _resolved_names[model_name] = FALLBACK_MODEL
+    return _models[model_name]
+
+def get_embedding_cache():
+    """
+    Get the shared embedding cache, or None when disabled with EMBEDDING_CACHE=0.
+    Location and size limit come from EMBEDDING_CACHE_DIR and EMBEDDING_CACHE_MAX_MB.
+    """
+    global _cache
+    if os.getenv("EMBEDDING_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        max_mb = os.getenv("EMBEDDING_CACHE_MAX_MB")
+        _cache = EmbeddingCache(
+            os.getenv("EMBEDDING_CACHE_DIR", DEFAULT_CACHE_DIR),
+            max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES,
+        )
+    return _cache
+
+def _encode(texts, batch_size, model_name):
+    model = get_embedding_model(model_name)
+    embeddings = model.encode(
+        list(texts), batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+    )
+    return embeddings.astype(np.float32, copy=False)
+
+def get_embeddings(texts, batch_size=DEFAULT_BATCH_SIZE, model_name=DEFAULT_MODEL, use_cache=True):
+    """
+    Encode many texts in batched forward passes.
+    Returns a (len(texts) x dim) float32 array with unit-length rows.
+    Texts already in the embedding cache are not re-encoded (and the model is not even
+    loaded when every text is a hit).
+    """
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, get_embedding_model(model_name).get_sentence_embedding_dimension()), dtype=np.float32)
+    cache = get_embedding_cache() if use_cache else None
+    if cache is None:
+        return _encode(texts, batch_size, model_name)
 
-def get_embedding(text, model_name='all-MiniLM-L6-v2'):
-    """Get embedding for text using cached sentence transformer model."""
-    model = get_embedding_model()
-    return model.encode(text, convert_to_numpy=True)
+    # Vectors are stored under the model that produced them; before this process has loaded the
+    # model, the cache's record of the last resolution (e.g. a fallback) gives that name
+    lookup_name = _resolved_names.get(model_name) or cache.model_alias(model_name)
+    vectors = cache.get_many(lookup_name, texts)
+    missing = [i for i, vec in enumerate(vectors) if vec is None]
+    if missing:
+        get_embedding_model(model_name)
+        resolved_name = _resolved_names[model_name]
+        if resolved_name != lookup_name:
+            # Resolved differently this time: the hits came from another model, look everything up again
+            cache.set_model_alias(model_name, resolved_name)
+            vectors = cache.get_many(resolved_name, texts)
+            missing = [i for i, vec in enumerate(vectors) if vec is None]
+        computed = _encode([texts[i] for i in missing], batch_size, model_name)
+        cache.put_many(resolved_name, [texts[i] for i in missing], computed)
+        for i, vec in zip(missing, computed):
+            vectors[i] = vec
+    else:
+        cache.flush()
+    return np.stack(vectors).astype(np.float32, copy=False)
+
+def get_embedding(text, model_name=DEFAULT_MODEL):
+    """Get embedding for a single text (see get_embeddings for batches)."""
+    return get_embeddings([text], model_name=model_name)[0]
 
 def cosine_similarity(vec1, vec2):
     """Calculate cosine similarity between two vectors."""
     return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+
+def normalize_rows(vectors):
+    """Stack vectors into a float32 matrix with unit-length rows (all-zero rows stay zero)."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def similarity_matrix(vectors_a, vectors_b):
+    """Cosine similarity of every row in vectors_a against every row in vectors_b (one matmul)."""
+    return normalize_rows(vectors_a) @ normalize_rows(vectors_b).T
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import inspect
+import hashlib
+from functools import lru_cache
+import pdf_utils
+import text_cleaner
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "extraction")
+# Bump to force re-extraction for changes the source fingerprint can't see (e.g. a new tesseract)
+EXTRACTOR_VERSION = "1"
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """sha256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def extractor_fingerprint():
+    """
+    Identifies the extraction + cleaning logic: the version above, the OCR DPI setting and
+    the source of the functions involved, so editing any of them invalidates old entries.
+    """
+    parts = [EXTRACTOR_VERSION, str(pdf_utils.DEFAULT_OCR_DPI)]
+    for func in (
+        pdf_utils.extract_pdf_pages, pdf_utils._ocr_page, pdf_utils.resolve_ocr_dpi,
+        text_cleaner.clean_resume_text,
+    ):
+        parts.append(inspect.getsource(func))
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+def extract_uncached(path):
+    """Extract and clean one resume/JD file, recording per-page OCR flags and timing."""
+    start = time.perf_counter()
+    if os.path.splitext(path)[1].lower() == ".pdf":
+        pages = pdf_utils.extract_pdf_pages(path)
+        raw_text = "\n".join(text for text, _ in pages).strip()
+        pages_ocr = [used_ocr for _, used_ocr in pages]
+    else:
+        raw_text = pdf_utils.get_resume_text(path)
+        pages_ocr = []
+    extract_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clean_text = text_cleaner.clean_resume_text(raw_text)
+    clean_seconds = time.perf_counter() - start
+
+    return {
+        "raw_text": raw_text,
+        "clean_text": clean_text,
+        "pages_ocr": pages_ocr,
+        "timing": {"extract_seconds": extract_seconds, "clean_seconds": clean_seconds},
+    }
+
+class ExtractionCache:
+    """
+    Persistent extraction results, one JSON file per distinct file content.
+    An entry is only served when it was produced by the current extractor fingerprint.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.fingerprint = extractor_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, content_hash):
+        return os.path.join(self.cache_dir, f"{content_hash}.json")
+
+    def extract(self, path):
+        """Return the extraction record for path, from the cache when the file is unchanged."""
+        content_hash = file_hash(path)
+        entry_path = self._entry_path(content_hash)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            if record.get("extractor_fingerprint") == self.fingerprint:
+                self.hits += 1
+                return record
+        except (OSError, ValueError):
+            pass
+
+        self.misses += 1
+        record = extract_uncached(path)
+        record.update({
+            "file_hash": content_hash,
+            "extractor_fingerprint": self.fingerprint,
+            "source_path": path,
+        })
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, entry_path)
+        return record
+
+    def lookup(self, content_hash):
+        """The stored record for a content hash, whichever extractor produced it, or None."""
+        return lookup_entry(self.cache_dir, content_hash)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def format_stats(self):
+        return f"Extraction cache: {self.hits} hits, {self.misses} misses"
+
+def lookup_entry(cache_dir, content_hash):
+    """The record stored for a content hash in an extraction cache folder, or None; never creates the folder."""
+    try:
+        with open(os.path.join(cache_dir, f"{content_hash}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Shared cache (created on first use)
+_cache = None
+
+def get_extraction_cache():
+    """Get the shared extraction cache, or None when disabled with EXTRACTION_CACHE=0."""
+    global _cache
+    if os.getenv("EXTRACTION_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        _cache = ExtractionCache(os.getenv("EXTRACTION_CACHE_DIR", DEFAULT_CACHE_DIR))
+    return _cache
+
+def extract_document(path):
+    """Extraction record (raw_text, clean_text, pages_ocr, timing) for a resume/JD file."""
+    cache = get_extraction_cache()
+    if cache is None:
+        record = extract_uncached(path)
+        record["file_hash"] = file_hash(path)
+        return record
+    return cache.extract(path)
+
+@lru_cache(maxsize=256)
+def load_clean_text(path, content_hash, cache_dir=None):
+    """
+    Cleaned text of a file as it was when its content hash was taken: from the entry in cache_dir
+    (the extraction cache it was analyzed with; default: the configured one), else re-extracted
+    from path, which must still exist with that content (ValueError otherwise). Nothing is written.
+    """
+    if cache_dir is None and os.getenv("EXTRACTION_CACHE", "1") != "0":
+        cache_dir = os.getenv("EXTRACTION_CACHE_DIR", DEFAULT_CACHE_DIR)
+    record = lookup_entry(cache_dir, content_hash) if cache_dir is not None else None
+    if record is None:
+        try:
+            if file_hash(path) != content_hash:
+                raise ValueError(f"{path} changed since it was analyzed and its extraction is no longer cached")
+            record = extract_uncached(path)
+        except OSError as e:
+            raise ValueError(f"{path} can't be read ({e}) and its extraction is not cached")
+    return record["clean_text"]
@@ -1,7 +1,7 @@
 from llm_utils import generate_feedback
 
-def generate_interview_questions(resume_text, jd_text, provider="local", model_key="llama3", num_questions=5):
-    prompt = f"""
+def build_interview_prompt(resume_text, jd_text, num_questions=5):
+    return f"""
 Given the resume below and job description below, write {num_questions} highly relevant, technical, and practical interview questions for this candidate (avoid generic HR questions).
 
 RESUME:
@@ -12,9 +12,15 @@ JOB DESCRIPTION:
 
 Return only an enumerated list of questions.
 """
-    response = generate_feedback(prompt, provider=provider, model_key=model_key)
+
+def parse_interview_questions(response):
     # Clean: Only keep bullet/numbered lines
     questions = [line for line in response.split('\n') if line.strip() and line[0].isdigit()]
     if not questions:
         questions = [line for line in response.split('\n') if '?' in line]
     return "\n".join(questions) if questions else response
+
+def generate_interview_questions(resume_text, jd_text, provider="local", model_key="llama3", num_questions=5):
+    prompt = build_interview_prompt(resume_text, jd_text, num_questions)
+    response = generate_feedback(prompt, provider=provider, model_key=model_key)
+    return parse_interview_questions(response)
@@ -1,7 +1,15 @@
 import os
+import time
+import threading
 import requests
 import json
+import atexit
+import httpx
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from groq import Groq
+from llm_cache import LLMResponseCache, response_cache_key, DEFAULT_CACHE_PATH, DEFAULT_TTL_SECONDS, DEFAULT_MAX_BYTES
 
 # Available model configurations
 AVAILABLE_MODELS = {
@@ -25,6 +33,57 @@ AVAILABLE_MODELS = {
     }
 }
 
+# Per-provider concurrency and rate limits for LLMScheduler (None = unlimited)
+PROVIDER_LIMITS = {
+    "local": {
+        # Keep in line with OLLAMA_NUM_PARALLEL on the Ollama server
+        "max_in_flight": int(os.getenv("OLLAMA_MAX_IN_FLIGHT", 2)),
+        "rpm": None,
+        "tpm": None,
+    },
+    "groq": {
+        "max_in_flight": int(os.getenv("GROQ_MAX_IN_FLIGHT", 4)),
+        "rpm": int(os.getenv("GROQ_RPM", 30)),
+        "tpm": int(os.getenv("GROQ_TPM", 6000)),
+    },
+}
+
+MAX_COMPLETION_TOKENS = 1024
+
+SYSTEM_PROMPT = "You are an expert AI resume reviewer. Provide detailed, actionable feedback."
+
+LOCAL_PROMPT_TEMPLATE = """{system}
+
+{prompt}
+
+Please provide your response in the following format:
+STRENGTHS:
+- [List key strengths]
+
+WEAKNESSES:
+- [List areas for improvement]
+
+SUGGESTIONS:
+- [Provide specific actionable recommendations]
+"""
+
+# JSON mode: the caller's prompt carries its own output schema
+LOCAL_JSON_PROMPT_TEMPLATE = """{system}
+
+{prompt}
+"""
+
+# Sampling parameters sent to each provider (also part of the response cache key)
+SAMPLING_PARAMS = {
+    "local": {"temperature": 0.3, "top_p": 0.9, "max_tokens": MAX_COMPLETION_TOKENS},
+    "groq": {"temperature": 0.3, "max_tokens": MAX_COMPLETION_TOKENS},
+}
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+# Keep-alive pool sizes for the shared provider clients (default: one connection per in-flight request)
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", PROVIDER_LIMITS["local"]["max_in_flight"]))
+GROQ_POOL_SIZE = int(os.getenv("GROQ_POOL_SIZE", PROVIDER_LIMITS["groq"]["max_in_flight"]))
+
 def list_available_models():
     """Display all available models for user selection"""
     print("\n=== AVAILABLE MODELS ===")
@@ -36,89 +95,481 @@ def list_available_models():
         print(f"  - {key}: {model}")
     print("="*30)
 
+class ConnectionStats:
+    """Counts requests and newly opened connections for one provider client."""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def as_dict(self, live_connections=0):
+        new_connections = self.new_connections + live_connections
+        return {
+            "requests": self.requests,
+            "new_connections": new_connections,
+            "reused_connections": max(self.requests - new_connections, 0),
+        }
+
+_connection_stats = {"local": ConnectionStats(), "groq": ConnectionStats()}
+_ollama_session = None
+_groq_client = None
+_clients_lock = threading.Lock()
+
+def _urllib3_connections(session):
+    """Connections opened so far by a requests.Session's urllib3 pools."""
+    total = 0
+    # http:// and https:// share one adapter
+    for adapter in {id(a): a for a in session.adapters.values()}.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            total += pools[key].num_connections
+    return total
+
+def get_ollama_session():
+    """Shared keep-alive requests.Session for Ollama (created on first use)."""
+    global _ollama_session
+    with _clients_lock:
+        if _ollama_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=OLLAMA_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _ollama_session = session
+        return _ollama_session
+
+def _trace_new_connections(request):
+    # httpcore reports connection setup through the "trace" request extension
+    def trace(event_name, info):
+        if event_name == "connection.connect_tcp.started":
+            _connection_stats["groq"].record_connection()
+    _connection_stats["groq"].record_request()
+    request.extensions["trace"] = trace
+
+def get_groq_client():
+    """Shared Groq client backed by one pooled httpx.Client (created on first use)."""
+    global _groq_client
+    with _clients_lock:
+        if _groq_client is None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=GROQ_POOL_SIZE, max_keepalive_connections=GROQ_POOL_SIZE),
+                timeout=httpx.Timeout(300.0, connect=10.0),
+                event_hooks={"request": [_trace_new_connections]},
+            )
+            _groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client)
+        return _groq_client
+
+def close_clients():
+    """Close the pooled provider connections (also registered to run at exit)."""
+    global _ollama_session, _groq_client
+    with _clients_lock:
+        if _ollama_session is not None:
+            _connection_stats["local"].new_connections += _urllib3_connections(_ollama_session)
+            _ollama_session.close()
+            _ollama_session = None
+        if _groq_client is not None:
+            _groq_client.close()
+            _groq_client = None
+
+atexit.register(close_clients)
+
+def connection_stats():
+    """Per-provider request/connection counters; reused_connections shows keep-alive at work."""
+    # urllib3 counts Ollama connections itself; fold in the live session's pools
+    live_local = _urllib3_connections(_ollama_session) if _ollama_session is not None else 0
+    return {
+        "local": _connection_stats["local"].as_dict(live_connections=live_local),
+        "groq": _connection_stats["groq"].as_dict(),
+    }
+
+def format_connection_stats():
+    return "\n".join(
+        f"{provider}: {s['requests']} requests, {s['new_connections']} new connections, "
+        f"{s['reused_connections']} reused"
+        for provider, s in connection_stats().items() if s["requests"]
+    )
+
+def _stream_groq(prompt, model, json_mode=False):
+    """
+    Yield completion text chunks from Groq as they arrive (raises on failure).
+    JSON mode isn't streamed by Groq, so it yields the whole response as one chunk.
+    """
+    messages = [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+    if json_mode:
+        completion = get_groq_client().chat.completions.create(
+            messages=messages,
+            model=model,
+            response_format={"type": "json_object"},
+            **SAMPLING_PARAMS["groq"]
+        )
+        yield completion.choices[0].message.content
+        return
+    stream = get_groq_client().chat.completions.create(
+        messages=messages,
+        model=model,
+        stream=True,
+        **SAMPLING_PARAMS["groq"]
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def _stream_local(prompt, model, ollama_url=OLLAMA_URL, stats=None, json_mode=False):
+    """
+    Yield completion text chunks from Ollama as they arrive (raises on failure).
+    If stats is a dict, Ollama's final eval_count/eval_duration are stored in it.
+    """
+    template = LOCAL_JSON_PROMPT_TEMPLATE if json_mode else LOCAL_PROMPT_TEMPLATE
+    data = {
+        "model": model,
+        "prompt": template.format(system=SYSTEM_PROMPT, prompt=prompt),
+        "stream": True,
+        "options": SAMPLING_PARAMS["local"]
+    }
+    if json_mode:
+        data["format"] = "json"
+    _connection_stats["local"].record_request()
+    with get_ollama_session().post(f"{ollama_url}/api/generate", json=data, timeout=300, stream=True) as response:
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} - {response.text}")
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"])
+            if chunk.get("response"):
+                yield chunk["response"]
+            if chunk.get("done"):
+                if stats is not None:
+                    stats["eval_count"] = chunk.get("eval_count")
+                    stats["eval_duration"] = chunk.get("eval_duration")
+                break
+
+# Start of the text returned in place of a response when a local / Groq call fails
+LLM_ERROR_PREFIXES = ("Error with local model", "Error with Groq API")
+
 def generate_feedback_groq(prompt, model="llama3-70b-8192"):
     """Generate feedback using Groq API"""
     try:
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert AI resume reviewer. Provide detailed, actionable feedback."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            model=model,
-            temperature=0.3,
-            max_tokens=1024
-        )
-        
-        return chat_completion.choices[0].message.content
+        return "".join(_stream_groq(prompt, model))
     except Exception as e:
-        return f"Error with Groq API: {str(e)}"
+        return f"{LLM_ERROR_PREFIXES[1]}: {str(e)}"
 
-def generate_feedback_local(prompt, model="llama3", ollama_url="http://localhost:11434"):
+def generate_feedback_local(prompt, model="llama3", ollama_url=OLLAMA_URL):
     """Generate feedback using local Ollama models"""
     try:
-        data = {
-            "model": model,
-            "prompt": f"""You are an expert AI resume reviewer. Provide detailed, actionable feedback.
+        return "".join(_stream_local(prompt, model, ollama_url)) or "No response generated"
+    except Exception as e:
+        return f"{LLM_ERROR_PREFIXES[0]}: {str(e)}"
 
-{prompt}
+# Per-call latency records (see record_call_metrics)
+_call_metrics = []
+_metrics_lock = threading.Lock()
 
-Please provide your response in the following format:
-STRENGTHS:
-- [List key strengths]
+def record_call_metrics(provider, model_key, ttft, total_seconds, tokens, cached=False, error=False, tokens_per_sec=None):
+    """Store timing for one LLM call: time-to-first-token, total time and tokens/sec."""
+    generation_seconds = total_seconds - ttft if ttft is not None else None
+    if tokens_per_sec is None and tokens and generation_seconds:
+        tokens_per_sec = tokens / generation_seconds
+    metrics = {
+        "provider": provider,
+        "model_key": model_key,
+        "ttft": ttft,
+        "total_seconds": total_seconds,
+        "tokens": tokens,
+        "tokens_per_sec": tokens_per_sec,
+        "cached": cached,
+        "error": error,
+    }
+    with _metrics_lock:
+        _call_metrics.append(metrics)
+    return metrics
 
-WEAKNESSES:
-- [List areas for improvement]
+def call_metrics():
+    with _metrics_lock:
+        return list(_call_metrics)
 
-SUGGESTIONS:
-- [Provide specific actionable recommendations]
-""",
-            "stream": False,
-            "options": {
-                "temperature": 0.3,
-                "top_p": 0.9,
-                "max_tokens": 1024
-            }
+def latency_summary():
+    """Mean TTFT, total latency and tokens/sec per (provider, model_key), over real (uncached, successful) calls."""
+    grouped = {}
+    for m in call_metrics():
+        if m["cached"] or m["error"]:
+            continue
+        grouped.setdefault((m["provider"], m["model_key"]), []).append(m)
+    summary = {}
+    for key, calls in grouped.items():
+        rates = [c["tokens_per_sec"] for c in calls if c["tokens_per_sec"]]
+        ttfts = [c["ttft"] for c in calls if c["ttft"] is not None]
+        summary[key] = {
+            "calls": len(calls),
+            "mean_ttft": sum(ttfts) / len(ttfts) if ttfts else None,
+            "mean_total_seconds": sum(c["total_seconds"] for c in calls) / len(calls),
+            "mean_tokens_per_sec": sum(rates) / len(rates) if rates else None,
         }
-        
-        response = requests.post(f"{ollama_url}/api/generate", json=data, timeout=300)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result.get('response', 'No response generated')
+    return summary
+
+def format_latency_summary():
+    lines = []
+    for (provider, model_key), s in sorted(latency_summary().items()):
+        ttft = f"{s['mean_ttft']:.2f}s" if s["mean_ttft"] is not None else "n/a"
+        rate = f"{s['mean_tokens_per_sec']:.1f} tok/s" if s["mean_tokens_per_sec"] else "n/a"
+        lines.append(
+            f"{provider}/{model_key}: {s['calls']} calls, TTFT {ttft}, "
+            f"{rate}, {s['mean_total_seconds']:.2f}s per call"
+        )
+    return "\n".join(lines)
+
+def resolve_model(provider, model_key):
+    """Map (provider, model_key) to (provider, model_key, model name), falling back to a default key."""
+    provider = provider.lower()
+    if provider == "local":
+        if model_key not in AVAILABLE_MODELS["local"]:
+            print(f"Warning: {model_key} not found in local models, using llama3")
+            model_key = "llama3"
+    elif provider == "groq":
+        if model_key not in AVAILABLE_MODELS["groq"]:
+            print(f"Warning: {model_key} not found in Groq models, using llama-3.3-70b-versatile")
+            model_key = "llama-3.3-70b-versatile"
+    else:
+        raise ValueError("Provider must be 'local' or 'groq'")
+    return provider, model_key, AVAILABLE_MODELS[provider][model_key]
+
+# Shared response cache (created on first use)
+_response_cache = None
+
+def get_response_cache():
+    """
+    Get the shared LLM response cache, or None when bypassed with LLM_CACHE=0.
+    Configured through LLM_CACHE_PATH, LLM_CACHE_TTL_DAYS and LLM_CACHE_MAX_MB.
+    """
+    global _response_cache
+    if os.getenv("LLM_CACHE", "1") == "0":
+        return None
+    with _clients_lock:
+        if _response_cache is None:
+            ttl_days = os.getenv("LLM_CACHE_TTL_DAYS")
+            max_mb = os.getenv("LLM_CACHE_MAX_MB")
+            _response_cache = LLMResponseCache(
+                os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl_seconds=float(ttl_days) * 24 * 3600 if ttl_days else DEFAULT_TTL_SECONDS,
+                max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES,
+            )
+        return _response_cache
+
+def _refresh_requested():
+    # LLM_CACHE_REFRESH=1: ignore cached responses but store the new ones
+    return os.getenv("LLM_CACHE_REFRESH", "0") == "1"
+
+def _response_key(prompt, provider, model_name, json_mode=False):
+    if provider == "local":
+        template = LOCAL_JSON_PROMPT_TEMPLATE if json_mode else LOCAL_PROMPT_TEMPLATE
+        prompt = template.format(system=SYSTEM_PROMPT, prompt=prompt)
+    else:
+        prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
+    params = dict(SAMPLING_PARAMS[provider], json_mode=json_mode)
+    return response_cache_key(provider, model_name, params, prompt)
+
+def get_cached_feedback(prompt, provider="local", model_key="llama3", json_mode=False):
+    """Cached response for this prompt/model, or None (also None when refreshing or bypassed)."""
+    cache = get_response_cache()
+    if cache is None or _refresh_requested():
+        return None
+    provider, model_key, model_name = resolve_model(provider, model_key)
+    return cache.get(_response_key(prompt, provider, model_name, json_mode))
+
+def stream_feedback(prompt, provider="local", model_key="llama3", use_cache=True, refresh=False, json_mode=False):
+    """
+    Generate feedback like generate_feedback, but yield text chunks as they arrive.
+    Records time-to-first-token and tokens/sec for the call (see latency_summary).
+    A cached response is yielded as a single chunk.
+    """
+    provider, model_key, model_name = resolve_model(provider, model_key)
+    cache = get_response_cache() if use_cache else None
+    key = _response_key(prompt, provider, model_name, json_mode) if cache is not None else None
+    start = time.perf_counter()
+    if key is not None and not (refresh or _refresh_requested()):
+        cached = cache.get(key)
+        if cached is not None:
+            elapsed = time.perf_counter() - start
+            record_call_metrics(provider, model_key, elapsed, elapsed, None, cached=True)
+            yield cached
+            return
+
+    chunks = []
+    ttft = None
+    ollama_stats = {}
+    try:
+        if provider == "local":
+            stream = _stream_local(prompt, model_name, stats=ollama_stats, json_mode=json_mode)
         else:
-            return f"Error: {response.status_code} - {response.text}"
+            stream = _stream_groq(prompt, model_name, json_mode=json_mode)
+        for chunk in stream:
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            chunks.append(chunk)
+            yield chunk
     except Exception as e:
-        return f"Error with local model: {str(e)}"
+        prefix = LLM_ERROR_PREFIXES[0] if provider == "local" else LLM_ERROR_PREFIXES[1]
+        record_call_metrics(provider, model_key, ttft, time.perf_counter() - start, len(chunks), error=True)
+        yield f"{prefix}: {str(e)}"
+        return
+
+    total_seconds = time.perf_counter() - start
+    # Ollama reports exact token counts; otherwise count streamed chunks (~1 token each)
+    tokens = ollama_stats.get("eval_count") or len(chunks)
+    tokens_per_sec = None
+    if ollama_stats.get("eval_count") and ollama_stats.get("eval_duration"):
+        tokens_per_sec = ollama_stats["eval_count"] / (ollama_stats["eval_duration"] / 1e9)
+    record_call_metrics(provider, model_key, ttft, total_seconds, tokens, tokens_per_sec=tokens_per_sec)
+    if not chunks:
+        yield "No response generated"
+        return
+    if key is not None:
+        cache.put(key, provider, model_name, "".join(chunks))
 
-def generate_feedback(prompt, provider="local", model_key="llama3"):
+def is_error_response(text):
+    """True for the text generate_feedback returns instead of a response when the call failed (also after partial output)."""
+    return not text or text == "No response generated" or any(f"{prefix}: " in text for prefix in LLM_ERROR_PREFIXES)
+
+def generate_feedback(prompt, provider="local", model_key="llama3", use_cache=True, refresh=False, json_mode=False):
     """
     Generate feedback using specified provider and model
     Args:
         prompt: The feedback prompt
         provider: "local" or "groq"
         model_key: Key from AVAILABLE_MODELS dict
+        use_cache: look up/store the response in the LLM response cache
+        refresh: skip the cache lookup but store the fresh response
+        json_mode: ask the provider for a JSON object response
     """
-    if provider.lower() == "local":
-        if model_key not in AVAILABLE_MODELS["local"]:
-            print(f"Warning: {model_key} not found in local models, using llama3")
-            model_key = "llama3"
-        model_name = AVAILABLE_MODELS["local"][model_key]
-        return generate_feedback_local(prompt, model=model_name)
-    
-    elif provider.lower() == "groq":
-        if model_key not in AVAILABLE_MODELS["groq"]:
-            print(f"Warning: {model_key} not found in Groq models, using llama3-70b")
-            model_key = "llama3-70b"
-        model_name = AVAILABLE_MODELS["groq"][model_key]
-        return generate_feedback_groq(prompt, model=model_name)
-    
-    else:
-        raise ValueError("Provider must be 'local' or 'groq'")
+    return "".join(stream_feedback(
+        prompt, provider, model_key, use_cache=use_cache, refresh=refresh, json_mode=json_mode
+    ))
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for rate limiting."""
+    return len(text) // 4 + 1
+
+class RateLimiter:
+    """Sliding one-minute window over requests and tokens (RPM/TPM)."""
+
+    def __init__(self, rpm=None, tpm=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._window = deque()  # (timestamp, tokens)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        """Block until a request of this many tokens fits in the window, then record it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._window and now - self._window[0][0] >= 60:
+                    self._window.popleft()
+                used_tokens = sum(t for _, t in self._window)
+                fits_rpm = self.rpm is None or len(self._window) < self.rpm
+                # A request larger than the whole TPM budget still goes through on an empty window
+                fits_tpm = self.tpm is None or not self._window or used_tokens + tokens <= self.tpm
+                if fits_rpm and fits_tpm:
+                    self._window.append((now, tokens))
+                    return
+                wait = 60 - (now - self._window[0][0])
+            time.sleep(max(wait, 0.05))
+
+class LLMScheduler:
+    """
+    Runs generate_feedback calls on background threads, keeping up to max_in_flight
+    requests per provider in flight while respecting its RPM/TPM limits.
+    submit() returns a concurrent.futures.Future holding the response text.
+    """
+
+    def __init__(self, limits=None):
+        self.limits = limits or PROVIDER_LIMITS
+        self._pools = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, provider):
+        with self._lock:
+            if provider not in self._pools:
+                limits = self.limits[provider]
+                self._pools[provider] = ThreadPoolExecutor(
+                    max_workers=limits["max_in_flight"], thread_name_prefix=f"llm-{provider}"
+                )
+                self._limiters[provider] = RateLimiter(limits["rpm"], limits["tpm"])
+            return self._pools[provider]
+
+    def generate(self, prompt, provider="local", model_key="llama3", json_mode=False):
+        """
+        Rate-limited generate_feedback on the calling thread. Meant for tasks already
+        running in this scheduler's pool (see submit_task), e.g. a follow-up repair call.
+        """
+        provider = provider.lower()
+        self._pool(provider)  # make sure the provider's limiter exists
+        # Cache hits don't spend rate limit budget
+        cached = get_cached_feedback(prompt, provider=provider, model_key=model_key, json_mode=json_mode)
+        if cached is not None:
+            return cached
+        # TPM counts prompt and completion tokens
+        self._limiters[provider].acquire(estimate_tokens(prompt) + MAX_COMPLETION_TOKENS)
+        return generate_feedback(prompt, provider=provider, model_key=model_key, refresh=True, json_mode=json_mode)
+
+    def stream(self, prompt, provider="local", model_key="llama3"):
+        """
+        Rate-limited stream_feedback on the calling thread: yields the response text in chunks
+        as it is generated. A cached response is yielded whole without spending rate limit budget.
+        """
+        provider = provider.lower()
+        self._pool(provider)  # make sure the provider's limiter exists
+        cached = get_cached_feedback(prompt, provider=provider, model_key=model_key)
+        if cached is not None:
+            yield cached
+            return
+        self._limiters[provider].acquire(estimate_tokens(prompt) + MAX_COMPLETION_TOKENS)
+        yield from stream_feedback(prompt, provider=provider, model_key=model_key, refresh=True)
+
+    def submit(self, prompt, provider="local", model_key="llama3", json_mode=False):
+        provider = provider.lower()
+        if provider not in self.limits:
+            raise ValueError("Provider must be 'local' or 'groq'")
+        return self._pool(provider).submit(self.generate, prompt, provider, model_key, json_mode)
+
+    def submit_task(self, provider, fn, /, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) in the provider's pool, occupying one in-flight slot.
+        fn should make its LLM calls through self.generate.
+        """
+        provider = provider.lower()
+        if provider not in self.limits:
+            raise ValueError("Provider must be 'local' or 'groq'")
+        return self._pool(provider).submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait, cancel_futures=cancel_pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # On errors/Ctrl-C don't start queued requests
+        self.shutdown(wait=True, cancel_pending=exc_type is not None)
@@ -1,28 +1,34 @@
 import os
 import glob
-import csv
+import zlib
+import argparse
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
 from dotenv import load_dotenv
-from pdf_utils import extract_text_from_pdf
-from text_cleaner import clean_resume_text, extract_sections
-from embedding_utils import get_embedding, cosine_similarity
-from llm_utils import generate_feedback, list_available_models, AVAILABLE_MODELS
-from skill_extractor import extract_skills, SKILL_LIST
-from visualization_utils import save_skill_venn, save_skill_bar
-from report_utils import save_pdf_report, save_html_report
-from ats_optimizer import ats_optimization_report, resume_format_suggestions
-from interview_questions import generate_interview_questions
+from llm_utils import (
+    list_available_models, AVAILABLE_MODELS, PROVIDER_LIMITS, LLMScheduler,
+    get_response_cache, format_connection_stats, format_latency_summary, is_error_response,
+)
+from document_utils import build_documents, embed_passages, score_documents, pair_scores
+from embedding_utils import DEFAULT_BATCH_SIZE, DEFAULT_MODEL, get_embedding_cache
+from extraction_cache import get_extraction_cache
+from rank_candidates import rank_score_matrix
+from retrieval import shortlist_candidates, DEFAULT_TOP_K
+from batch_checkpoint import BatchCheckpoint, pair_key
+from results_store import ResultsStore
+from parallel_utils import worker_pool, DEFAULT_WORKERS
+from pair_reports import save_analysis, render_report
+from ats_optimizer import ats_optimization_report, ats_resume_profile, ats_profile_corpus
+from interview_questions import parse_interview_questions
+from prompt_utils import build_pair_prompts
+from review_utils import generate_review, format_review_feedback, format_interview_questions
 
 load_dotenv()
 
-def get_resume_text(resume_path):
-    file_ext = os.path.splitext(resume_path)[1].lower()
-    if file_ext == ".pdf":
-        return extract_text_from_pdf(resume_path)
-    elif file_ext == ".txt":
-        with open(resume_path, "r", encoding="utf-8") as f:
-            return f.read()
-    else:
-        raise ValueError("Unsupported resume file format! Please provide PDF or TXT.")
+NUM_INTERVIEW_QUESTIONS = 5
+# One structured LLM call per pair (review + interview questions); LLM_SINGLE_CALL=0 for two calls
+SINGLE_CALL = os.getenv("LLM_SINGLE_CALL", "1") != "0"
 
 def get_user_model_choice():
     """Get user's choice of model provider and specific model"""
@@ -58,161 +64,433 @@ def get_user_model_choice():
     
     return provider, model_key
 
-def process_resume_vs_jd(resume_path, jd_path, provider, model_key, out_prefix="outputs"):
-    resume_text = get_resume_text(resume_path)
-    resume_clean_text = clean_resume_text(resume_text)
-    with open(jd_path, "r", encoding="utf-8") as f:
-        job_desc_clean = clean_resume_text(f.read())
-
-    resume_embed = get_embedding(resume_clean_text)
-    job_embed = get_embedding(job_desc_clean)
-    overall_score = cosine_similarity(resume_embed, job_embed)
-
-    resume_sections = extract_sections(resume_clean_text)
-    jd_sections = extract_sections(job_desc_clean)
-    tracked_sections = ["skills", "education", "project experience", "experience"]
-    section_scores = {}
-    for sec in tracked_sections:
-        resume_val = resume_sections.get(sec, "")
-        jd_val = jd_sections.get(sec, "")
-        if not resume_val.strip():
-            resume_val = resume_clean_text
-        if not jd_val.strip():
-            jd_val = job_desc_clean
-        if resume_val.strip() and jd_val.strip():
-            r_embed = get_embedding(resume_val)
-            j_embed = get_embedding(jd_val)
-            section_scores[sec] = cosine_similarity(r_embed, j_embed)
-        else:
-            section_scores[sec] = 0.0
+def analyze_pair(resume_doc, jd_doc, overall_score, section_scores, model_key=None, ats_profile=None):
+    """
+    CPU part of the pairing stage: skill gap, ATS report and the two LLM prompts,
+    built from two preprocessed document artifacts (see document_utils.build_document).
+    ats_profile is the resume's ats_scan result when the batch already has it (ats_profile_corpus).
+    """
+    resume_clean_text = resume_doc["clean_text"]
 
-    skills_resume = extract_skills(resume_clean_text)
-    skills_jd = extract_skills(job_desc_clean)
+    skills_resume = resume_doc["skills"]
+    skills_jd = jd_doc["skills"]
     matched = skills_resume & skills_jd
     missing = skills_jd - skills_resume
     extra = skills_resume - skills_jd
 
-    # ATS Optimization
+    # ATS Optimization: the resume's scan is shared by all its pairs, only keyword coverage is per pair
+    if ats_profile is None:
+        ats_profile = ats_resume_profile(resume_clean_text, resume_doc["file_hash"])
     ats_composite, ats_keyword_coverage, ats_sections_found, ats_sections_missing, ats_issues, ats_report = ats_optimization_report(
-        resume_clean_text, matched, skills_jd
+        resume_clean_text, matched, skills_jd, profile=ats_profile
     )
     print(ats_report)
 
-    format_sugg = resume_format_suggestions(ats_sections_missing, ats_issues)
+    format_sugg = ats_profile["format_suggestions"]
+
+    # Both prompts share one token-budgeted context of the most JD-relevant resume passages
+    prompts = build_pair_prompts(
+        resume_doc, jd_doc, overall_score, section_scores, ats_report,
+        matched, missing, extra, model_key=model_key, num_questions=NUM_INTERVIEW_QUESTIONS
+    )
+
+    return {
+        "resume_doc": resume_doc, "jd_doc": jd_doc,
+        "overall_score": overall_score, "section_scores": section_scores,
+        "matched": matched, "missing": missing, "extra": extra,
+        "ats_composite": ats_composite, "ats_keyword_coverage": ats_keyword_coverage,
+        "ats_sections_found": ats_sections_found, "ats_sections_missing": ats_sections_missing,
+        "ats_issues": ats_issues, "ats_report": ats_report, "format_sugg": format_sugg,
+        "feedback_prompt": prompts["feedback_prompt"],
+        "interview_prompt": prompts["interview_prompt"],
+        "review_prompt": prompts["review_prompt"],
+    }
+
+def analysis_record(analysis, llm_feedback, interview_qs, provider, model_key):
+    """Everything needed to render a pair's reports later, as JSON-ready data (see pair_reports)."""
+    resume_doc, jd_doc = analysis["resume_doc"], analysis["jd_doc"]
+    extraction_cache = get_extraction_cache()
+    return {
+        "resume_filename": resume_doc["filename"], "jd_filename": jd_doc["filename"],
+        "resume_id": resume_doc["doc_id"], "jd_id": jd_doc["doc_id"],
+        # Texts are referenced by file hash (extraction cache), not copied into every pair's record;
+        # absolute paths so the reports can be rendered from any working directory
+        "resume_path": os.path.abspath(resume_doc["path"]), "resume_hash": resume_doc["file_hash"],
+        "jd_path": os.path.abspath(jd_doc["path"]), "jd_hash": jd_doc["file_hash"],
+        "extraction_cache_dir": os.path.abspath(extraction_cache.cache_dir) if extraction_cache is not None else None,
+        "resume_skills": sorted(resume_doc["skills"]), "jd_skills": sorted(jd_doc["skills"]),
+        "provider": provider, "model_key": model_key,
+        "overall_score": analysis["overall_score"], "section_scores": analysis["section_scores"],
+        "matched": sorted(analysis["matched"]), "missing": sorted(analysis["missing"]), "extra": sorted(analysis["extra"]),
+        "ats_composite": analysis["ats_composite"], "ats_keyword_coverage": analysis["ats_keyword_coverage"],
+        "ats_sections_found": list(analysis["ats_sections_found"]),
+        "ats_sections_missing": list(analysis["ats_sections_missing"]),
+        "ats_issues": list(analysis["ats_issues"]), "ats_report": analysis["ats_report"],
+        "format_sugg": analysis["format_sugg"],
+        "llm_feedback": llm_feedback, "interview_qs": interview_qs,
+    }
 
-    feedback_prompt = f"""
-Analyze this resume against the job description and provide detailed feedback.
+def finalize_pair(analysis, llm_feedback, interview_qs, provider, model_key, out_prefix="outputs",
+                  render=True, charts=True, pdf=True, html=True):
+    """
+    Stores an analyzed pair's record, renders its charts and reports unless render=False
+    (they can be rendered later with pair_reports.py) and returns its results row.
+    charts/pdf/html switch the individual outputs off.
+    """
+    record = analysis_record(analysis, llm_feedback, interview_qs, provider, model_key)
+    record_path = save_analysis(record, out_prefix)
+    # The batch has the texts in memory; only deferred renders load them back by file hash
+    texts = (analysis["resume_doc"]["clean_text"], analysis["jd_doc"]["clean_text"])
+    report_path = render_report(record, out_prefix, charts=charts, pdf=pdf, html=html, texts=texts) if render else ""
+    section_scores = record["section_scores"]
 
-RESUME:
-{resume_clean_text}
+    # Results row with ATS results (columns: results_store.RESULT_COLUMNS)
+    return {
+        "resume_filename": record["resume_filename"], "jd_filename": record["jd_filename"],
+        "model_provider": provider, "model_key": model_key,
+        **score_columns(record["overall_score"], section_scores),
+        "matched_skills": ", ".join(record["matched"]),
+        "missing_skills": ", ".join(record["missing"]),
+        "extra_skills": ", ".join(record["extra"]),
+        "ats_composite_score": record["ats_composite"],
+        "ats_keyword_coverage": record["ats_keyword_coverage"],
+        "ats_sections_found": "|".join(record["ats_sections_found"]),
+        "ats_sections_missing": "|".join(record["ats_sections_missing"]),
+        "ats_format_issues": "|".join(record["ats_issues"]),
+        "interview_questions": interview_qs,
+        "resume_format_suggestions": record["format_sugg"],
+        "report_path": report_path,
+        "analysis_path": record_path,
+    }
 
-JOB DESCRIPTION:
-{job_desc_clean}
+def score_columns(overall_score, section_scores):
+    return {
+        "overall_score": overall_score,
+        "skills_score": section_scores.get("skills", 0.0),
+        "education_score": section_scores.get("education", 0.0),
+        "project_score": section_scores.get("project experience", 0.0),
+        "experience_score": section_scores.get("experience", 0.0),
+    }
 
-SIMILARITY SCORES:
-- Overall Match: {overall_score:.3f}
-- Skills Match: {section_scores.get('skills', 0):.3f}
-- Education Match: {section_scores.get('education', 0):.3f}
-- Experience Match: {section_scores.get('experience', 0):.3f}
-- Project Experience Match: {section_scores.get('project experience', 0):.3f}
+def scores_only_row(resume_doc, jd_doc, overall_score, section_scores):
+    """Results row for a pair outside the shortlist: scores and skill gap, no ATS/LLM/report columns."""
+    skills_resume, skills_jd = resume_doc["skills"], jd_doc["skills"]
+    return {
+        "resume_filename": resume_doc["filename"], "jd_filename": jd_doc["filename"],
+        **score_columns(overall_score, section_scores),
+        "matched_skills": ", ".join(sorted(skills_resume & skills_jd)),
+        "missing_skills": ", ".join(sorted(skills_jd - skills_resume)),
+        "extra_skills": ", ".join(sorted(skills_resume - skills_jd)),
+    }
 
-ATS OPTIMIZATION REPORT:
-{ats_report}
+def submit_llm_requests(scheduler, analysis, provider, model_key, single_call=SINGLE_CALL):
+    """
+    Queue a pair's LLM work: one structured review call in single-call mode, otherwise
+    the feedback and interview-question prompts, running concurrently.
+    """
+    if single_call:
+        return (scheduler.submit_task(
+            provider, generate_review, analysis["review_prompt"], provider=provider, model_key=model_key,
+            num_questions=NUM_INTERVIEW_QUESTIONS, generate=scheduler.generate,
+        ),)
+    return (
+        scheduler.submit(analysis["feedback_prompt"], provider=provider, model_key=model_key),
+        scheduler.submit(analysis["interview_prompt"], provider=provider, model_key=model_key),
+    )
 
-Matched skills: {', '.join(sorted(matched))}
-Missing (in JD, not in resume): {', '.join(sorted(missing))}
-Extra (in resume, not in JD): {', '.join(sorted(extra))}
+def stream_llm_requests(scheduler, analysis, provider, model_key):
+    """
+    Two-prompt mode of submit_llm_requests, but the feedback is printed token by token as it is
+    generated (through the scheduler's rate limiter) while the interview questions run in the pool.
+    Returns the same (feedback, questions) futures, the feedback one already done.
+    """
+    questions_future = scheduler.submit(analysis["interview_prompt"], provider=provider, model_key=model_key)
+    chunks = []
+    for chunk in scheduler.stream(analysis["feedback_prompt"], provider=provider, model_key=model_key):
+        print(chunk, end="", flush=True)
+        chunks.append(chunk)
+    print()
+    feedback_future = Future()
+    # A call that fails mid-stream ends with the error text; keep only that so the pair counts as failed
+    feedback_future.set_result(chunks[-1] if chunks and is_error_response(chunks[-1]) else "".join(chunks))
+    return feedback_future, questions_future
 
-Please evaluate the resume and provide specific feedback for improvement.
-"""
+def collect_llm_results(analysis, futures):
+    """
+    Wait for a pair's LLM responses; returns (llm_feedback, interview_qs, ok), empty when no LLM was asked.
+    ok is False when a call failed (an error response) or no usable review came back after the repair retry.
+    """
+    if not futures:
+        return "", "", True
+    filename = analysis["resume_doc"]["filename"]
+    if len(futures) == 1:
+        review, raw_response = futures[0].result()
+        if review is not None:
+            return format_review_feedback(review), format_interview_questions(review), True
+        if is_error_response(raw_response):
+            print(f"Warning: LLM call failed for {filename}: {raw_response}")
+        else:
+            # Still invalid after the repair retry: keep the raw text rather than lose it
+            print(f"Warning: unparseable structured review for {filename}")
+        return raw_response, parse_interview_questions(raw_response), False
+    feedback_future, questions_future = futures
+    llm_feedback, questions = feedback_future.result(), questions_future.result()
+    failed = [response for response in (llm_feedback, questions) if is_error_response(response)]
+    if failed:
+        print(f"Warning: LLM call failed for {filename}: {failed[0]}")
+    return llm_feedback, parse_interview_questions(questions), not failed
 
+def finish_pair(analysis, futures, provider, model_key, out_prefix="outputs"):
+    """Wait for a pair's LLM responses, then render its reports."""
+    llm_feedback, interview_qs, _ = collect_llm_results(analysis, futures)
+    return finalize_pair(analysis, llm_feedback, interview_qs, provider, model_key, out_prefix=out_prefix)
+
+def process_resume_vs_jd(resume_doc, jd_doc, overall_score, section_scores, provider, model_key, out_prefix="outputs", scheduler=None, stream=False):
+    """
+    Full pairing stage for one pair.
+    With stream=True the feedback is printed token by token as it is generated; this
+    uses the two-prompt mode, since a JSON review isn't readable while it streams.
+    """
+    embed_passages([resume_doc], model_name=os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL))
+    analysis = analyze_pair(resume_doc, jd_doc, overall_score, section_scores, model_key=model_key)
     print(f"Generating feedback using {provider} model: {model_key}")
-    llm_feedback = generate_feedback(feedback_prompt, provider=provider, model_key=model_key)
+    own_scheduler = scheduler is None
+    if own_scheduler:
+        scheduler = LLMScheduler()
+    try:
+        if stream:
+            futures = stream_llm_requests(scheduler, analysis, provider, model_key)
+        else:
+            futures = submit_llm_requests(scheduler, analysis, provider, model_key)
+        return finish_pair(analysis, futures, provider, model_key, out_prefix=out_prefix)
+    finally:
+        if own_scheduler:
+            scheduler.shutdown()
 
-    interview_qs = generate_interview_questions(
-    resume_clean_text, job_desc_clean, provider=provider, model_key=model_key, num_questions=5
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Match every resume against every job description.")
+    parser.add_argument("--provider", choices=list(AVAILABLE_MODELS),
+                        help="LLM provider; asked interactively when neither --provider nor --model is given")
+    parser.add_argument("--model", help="model key, e.g. llama3 or llama-3.3-70b-versatile (see AVAILABLE_MODELS)")
+    parser.add_argument("--resume-dir", default="data/resumes", help="folder of resumes (default: %(default)s)")
+    parser.add_argument("--jd-dir", default="data/jds", help="folder of .txt job descriptions (default: %(default)s)")
+    parser.add_argument("--output-dir", default="outputs", help="reports and charts (default: %(default)s)")
+    parser.add_argument("--results",
+                        help="results database (default: <output-dir>/batch_results.sqlite3, "
+                             "batch_results_shard<i>.sqlite3 when sharded)")
+    parser.add_argument("--export-csv", metavar="PATH", help="also write all results to this CSV file")
+    parser.add_argument("--shard-index", type=int, default=0, help="which slice of the resume x JD pairs to run")
+    parser.add_argument("--shard-count", type=int, default=1, help="number of slices the pairs are split into")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K,
+                        help="resumes per JD that get the full analysis, 0 for all (default: %(default)s)")
+    parser.add_argument("--skip-llm", action="store_true", help="no LLM feedback or interview questions")
+    parser.add_argument("--stream", action="store_true",
+                        help="print each pair's LLM feedback as it is generated (two-prompt mode, one pair at a time)")
+    parser.add_argument("--skip-pdf", action="store_true", help="no PDF reports")
+    parser.add_argument("--skip-html", action="store_true", help="no HTML reports")
+    parser.add_argument("--skip-charts", action="store_true", help="no skill charts")
+    parser.add_argument("--defer-reports", action="store_true",
+                        help="only store each pair's analysis; render reports later with pair_reports.py")
+    parser.add_argument("--report-min-score", type=float,
+                        default=float(os.environ["REPORT_MIN_SCORE"]) if os.getenv("REPORT_MIN_SCORE") else None,
+                        help="render reports only for pairs with at least this overall score")
+    parser.add_argument("--scores-only", action="store_true",
+                        help="similarity scores and skill gap only: no ATS, LLM or reports")
+    parser.add_argument("--fresh", action="store_true", default=os.getenv("BATCH_FRESH", "0") == "1",
+                        help="ignore the checkpoint and re-run every pair")
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS,
+        help="worker processes for document preprocessing and report rendering (default: 1, in-process)",
     )
+    args = parser.parse_args(argv)
 
-    cand_id = os.path.splitext(os.path.basename(resume_path))[0]
-    jd_id = os.path.splitext(os.path.basename(jd_path))[0]
-    os.makedirs(out_prefix, exist_ok=True)
-    pdf_report = f"{out_prefix}/{cand_id}__{jd_id}_report.pdf"
-    html_report = f"{out_prefix}/{cand_id}__{jd_id}_report.html"
-    venn_img = f"{out_prefix}/{cand_id}__{jd_id}_venn.png"
-    bar_img = f"{out_prefix}/{cand_id}__{jd_id}_bar.png"
-    save_skill_venn(skills_resume, skills_jd, venn_img)
-    save_skill_bar(skills_resume, skills_jd, bar_img)
-
-    def clean_text_for_pdf(text):
-        replacements = {
-            '\u2013': '-', '\u2014': '--', '\u2018': "'", '\u2019': "'",
-            '\u201c': '"', '\u201d': '"', '\u2022': '*', '\u00a0': ' ',
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        return text.encode('latin1', 'ignore').decode('latin1')
-
-    save_pdf_report(
-        pdf_report, clean_text_for_pdf(resume_clean_text), clean_text_for_pdf(job_desc_clean),
-        section_scores, overall_score, clean_text_for_pdf(llm_feedback + "\n\n" + ats_report)
-    )
-    save_html_report(html_report, resume_clean_text, job_desc_clean, section_scores, overall_score, llm_feedback + "\n\n" + ats_report)
-
-    # Return matrix row with ATS results
-    return [
-        os.path.basename(resume_path), os.path.basename(jd_path), provider, model_key,
-        overall_score, section_scores.get("skills", 0.0),
-        section_scores.get("education", 0.0),
-        section_scores.get("project experience", 0.0),
-        section_scores.get("experience", 0.0),
-        ", ".join(sorted(matched)), ", ".join(sorted(missing)), ", ".join(sorted(extra)),
-        ats_composite, ats_keyword_coverage, "|".join(ats_sections_found), "|".join(ats_sections_missing), "|".join(ats_issues),
-        format_sugg,
-        interview_qs,
-        pdf_report
-    ]
-
-
-def main():
-    resume_folder = "data/resumes"
-    jd_folder = "data/jds"
-    output_summary_path = "outputs/batch_matrix.csv"
-
-    # Get user's model choice once for the batch
-    provider, model_key = get_user_model_choice()
-    print(f"\nUsing {provider} model: {model_key}")
-
-    resume_files = glob.glob(f"{resume_folder}/*.*")
-    jd_files = glob.glob(f"{jd_folder}/*.txt")
-
-    matrix_headers = [
-    "resume_filename", "jd_filename", "model_provider", "model_key",
-    "overall_score", "skills_score", "education_score", "project_score", "experience_score",
-    "matched_skills", "missing_skills", "extra_skills",
-    "ats_composite_score", "ats_keyword_coverage",
-    "ats_sections_found", "ats_sections_missing", "ats_format_issues",
-    "interview_questions", "resume_format_suggestions",
-    "report_path"
-    ]      
-
-    matrix_rows = []
-    total = len(resume_files) * len(jd_files)
+    if args.shard_count < 1 or not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be in [0, --shard-count)")
+    if args.model is not None:
+        if args.provider is None:
+            # Model keys are unique across providers
+            args.provider = next((p for p, models in AVAILABLE_MODELS.items() if args.model in models), None)
+        if args.provider is None or args.model not in AVAILABLE_MODELS[args.provider]:
+            parser.error(f"unknown model key '{args.model}'")
+    elif args.provider is not None:
+        parser.error("--provider needs --model")
+    if args.results is None:
+        name = "batch_results.sqlite3" if args.shard_count == 1 else f"batch_results_shard{args.shard_index}.sqlite3"
+        args.results = os.path.join(args.output_dir, name)
+    return args
+
+def in_shard(resume_doc, jd_doc, shard_index, shard_count):
+    """Stable pair -> shard assignment by file names, so every machine agrees without coordination."""
+    if shard_count == 1:
+        return True
+    return zlib.crc32(f"{resume_doc['filename']}|{jd_doc['filename']}".encode("utf-8")) % shard_count == shard_index
+
+def main(argv=None):
+    args = parse_args(argv)
+    embedding_model = os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL)
+    embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    use_llm = not (args.scores_only or args.skip_llm)
+    render = {"charts": not args.skip_charts, "pdf": not args.skip_pdf, "html": not args.skip_html}
+    report_options = {**render, "defer": args.defer_reports, "min_score": args.report_min_score}
+
+    if not use_llm:
+        provider, model_key = "", ""
+    elif args.model is None:
+        # Get user's model choice once for the batch
+        provider, model_key = get_user_model_choice()
+    else:
+        provider, model_key = args.provider, args.model
+    if use_llm:
+        print(f"\nUsing {provider} model: {model_key}")
+
+    resume_files = sorted(glob.glob(f"{args.resume_dir}/*.*"))
+    jd_files = sorted(glob.glob(f"{args.jd_dir}/*.txt"))
+
+    # Phase 1: heavy per-document work, once per resume and once per JD.
+    # Every shard embeds all documents: the shortlist ranks each JD against the whole resume pool.
+    with worker_pool(args.workers) as pool:
+        resume_docs = build_documents(
+            resume_files, label="resume", batch_size=embedding_batch_size, model_name=embedding_model, pool=pool
+        )
+        jd_docs = build_documents(
+            jd_files, label="JD", batch_size=embedding_batch_size, model_name=embedding_model, pool=pool
+        )
+
+    # With workers the extraction cache is used in the worker processes, so its stats here would read 0
+    caches = (get_embedding_cache(),) if args.workers > 1 else (get_extraction_cache(), get_embedding_cache())
+    for cache in caches:
+        if cache is not None:
+            print(cache.format_stats())
+
+    # Phase 2: all similarity scores for the batch as a few matrix products
+    scores = score_documents(resume_docs, jd_docs)
+
+    # Retrieval stage: only the top resumes per JD get the full analysis, the rest a scores-only row
+    ats_profiles = {}
+    if args.scores_only:
+        shortlist = np.zeros((len(resume_docs), len(jd_docs)), dtype=bool)
+    else:
+        shortlist = shortlist_candidates(resume_docs, jd_docs, top_k=args.top_k)
+        print(f"Shortlisted {int(shortlist.sum())} of {shortlist.size} pairs for full analysis (top {args.top_k or 'all'} per JD)")
+        shortlisted_resumes = [resume_docs[i] for i in np.flatnonzero(shortlist.any(axis=1))]
+        # Resume-only ATS checks in one batch, once per shortlisted resume; every pair reuses the result
+        ats_profiles = ats_profile_corpus(shortlisted_resumes)
+        if use_llm:
+            # Passages are only ranked when building LLM prompts, so only these resumes need them embedded
+            embed_passages(shortlisted_resumes, batch_size=embedding_batch_size, model_name=embedding_model)
+
+    # Completed pairs from earlier (interrupted or nightly) runs are skipped; rows are written as they finish
+    results = ResultsStore(args.results)
+    checkpoint = BatchCheckpoint(results)
+    if args.fresh:
+        checkpoint.reset()
+    keys = {
+        (i, j): pair_key(resume_doc, jd_doc, f"{provider}/{model_key}", embedding_model, options=report_options)
+        for i, resume_doc in enumerate(resume_docs) for j, jd_doc in enumerate(jd_docs)
+        if in_shard(resume_doc, jd_doc, args.shard_index, args.shard_count)
+    }
+    if args.shard_count > 1:
+        print(f"Shard {args.shard_index + 1}/{args.shard_count}: {len(keys)} of {shortlist.size} pairs")
+    checkpoint.start(keys.values())
+    total = sum(1 for (i, j), key in keys.items() if shortlist[i, j] and not checkpoint.is_done(key))
+    if checkpoint.resumed:
+        print(f"Resuming: {checkpoint.resumed} pairs already done, {total} left to analyze")
     count = 1
 
-    for resume_path in resume_files:
-        for jd_path in jd_files:
-            print(f"\n[{count}/{total}] Resume: {os.path.basename(resume_path)} vs JD: {os.path.basename(jd_path)}")
-            matrix_row = process_resume_vs_jd(resume_path, jd_path, provider, model_key, out_prefix="outputs")
-            matrix_rows.append(matrix_row)
+    # LLM requests for the next few pairs stay in flight while earlier pairs render reports
+    window = 2 * PROVIDER_LIMITS[provider]["max_in_flight"] if use_llm and not args.stream else 1
+    pending = deque()
+    # With workers, reports render in the pool; rows (and their status) are still recorded in submission order
+    rendering = deque()
+
+    def record_next():
+        key, row_future, status = rendering.popleft()
+        row = row_future.result()
+        checkpoint.record(key, row, status=status, resume=row["resume_filename"], jd=row["jd_filename"])
+
+    def finish_next(render_pool):
+        key, analysis, futures = pending.popleft()
+        llm_feedback, interview_qs, ok = collect_llm_results(analysis, futures)
+        # Low-scoring pairs (and deferred runs) only get their analysis stored
+        render_now = not args.defer_reports and (
+            args.report_min_score is None or analysis["overall_score"] >= args.report_min_score
+        )
+        status = "done" if ok else "failed"
+        if ok and render_now and render_pool is not None:
+            row_future = render_pool.submit(
+                finalize_pair, analysis, llm_feedback, interview_qs, provider, model_key, out_prefix=args.output_dir, **render
+            )
+        else:
+            if ok:
+                row = finalize_pair(
+                    analysis, llm_feedback, interview_qs, provider, model_key, out_prefix=args.output_dir,
+                    render=render_now, **render
+                )
+            else:
+                # No analysis or report from a failed LLM call: a scores-only row, and the next run retries the pair
+                row = scores_only_row(
+                    analysis["resume_doc"], analysis["jd_doc"], analysis["overall_score"], analysis["section_scores"]
+                )
+            if render_pool is None:
+                checkpoint.record(key, row, status=status, resume=row["resume_filename"], jd=row["jd_filename"])
+                return
+            # Nothing to render in the pool: keep its place in the recording order
+            row_future = Future()
+            row_future.set_result(row)
+        rendering.append((key, row_future, status))
+        while rendering and (rendering[0][1].done() or len(rendering) > 2 * args.workers):
+            record_next()
+
+    if use_llm:
+        print(f"Generating feedback using {provider} model: {model_key}")
+    with checkpoint, LLMScheduler() as scheduler, worker_pool(args.workers if total else 1) as render_pool:
+        for (i, j), key in keys.items():
+            if checkpoint.is_done(key):
+                continue
+            resume_doc, jd_doc = resume_docs[i], jd_docs[j]
+            overall_score, section_scores = pair_scores(scores, i, j)
+            if not shortlist[i, j]:
+                checkpoint.append_row(scores_only_row(resume_doc, jd_doc, overall_score, section_scores))
+                continue
+            print(f"\n[{count}/{total}] Resume: {resume_doc['filename']} vs JD: {jd_doc['filename']}")
+            analysis = analyze_pair(
+                resume_doc, jd_doc, overall_score, section_scores, model_key=model_key or None,
+                ats_profile=ats_profiles.get(resume_doc["file_hash"]),
+            )
+            if not use_llm:
+                futures = ()
+            elif args.stream:
+                futures = stream_llm_requests(scheduler, analysis, provider, model_key)
+            else:
+                futures = submit_llm_requests(scheduler, analysis, provider, model_key)
+            pending.append((key, analysis, futures))
+            if len(pending) >= window:
+                finish_next(render_pool)
             count += 1
+        while pending:
+            finish_next(render_pool)
+        while rendering:
+            record_next()
+
+    print(f"\nResults saved: {args.results}")
+    print(checkpoint.format_stats())
+    if args.export_csv:
+        results.export_csv(args.export_csv)
+        print(f"Results exported: {args.export_csv}")
+    results.close()
+
+    top = rank_score_matrix(
+        scores["overall"], [d["filename"] for d in resume_docs], [d["filename"] for d in jd_docs], top_n=3
+    )
+    print("\n--- Top Candidates per JD (overall_score) ---")
+    print(top.to_string(index=False))
 
-    # Save CSV matrix for all results
-    with open(output_summary_path, "w", newline='', encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(matrix_headers)
-        for row in matrix_rows:
-            writer.writerow(row)
-    print(f"\nMatching matrix saved: {output_summary_path}")
+    if use_llm:
+        response_cache = get_response_cache()
+        if response_cache is not None:
+            print("\n" + response_cache.format_stats())
+        print(format_connection_stats())
+        print(format_latency_summary())
 
 if __name__ == "__main__":
     main()
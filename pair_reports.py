@@ -0,0 +1,117 @@
+import os
+import glob
+import json
+import argparse
+from extraction_cache import load_clean_text
+from visualization_utils import render_skill_charts
+from report_utils import save_pdf_report, save_html_report
+from parallel_utils import worker_pool, DEFAULT_WORKERS
+
+# Stored pair analyses live in this folder under the output directory
+ANALYSIS_DIR = "analysis"
+
+def analysis_path(out_prefix, resume_id, jd_id):
+    return os.path.join(out_prefix, ANALYSIS_DIR, f"{resume_id}__{jd_id}.json")
+
+def save_analysis(record, out_prefix="outputs"):
+    """
+    Persist a pair's analysis record (see main.analysis_record) as JSON so its reports can be
+    rendered later. Returns the file path.
+    """
+    path = analysis_path(out_prefix, record["resume_id"], record["jd_id"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(tmp_path, path)
+    return path
+
+def load_analysis(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def record_texts(record):
+    """A record's cleaned resume and JD texts: from the extraction cache by file hash (older records hold them inline)."""
+    if "resume_text" in record:
+        return record["resume_text"], record["jd_text"]
+    cache_dir = record.get("extraction_cache_dir")
+    return (
+        load_clean_text(record["resume_path"], record["resume_hash"], cache_dir),
+        load_clean_text(record["jd_path"], record["jd_hash"], cache_dir),
+    )
+
+def render_report(record, out_prefix="outputs", charts=True, pdf=True, html=True, texts=None):
+    """
+    Writes the reports for a stored analysis record, with its skill charts rendered in memory
+    and embedded in both reports (charts=False leaves them out). texts is the (resume, JD) cleaned
+    text pair when the caller already has it; otherwise it is loaded by file hash (record_texts).
+    Returns the report path: the PDF, or the HTML file when PDFs are off, or "" when both are.
+    """
+    cand_id, jd_id = record["resume_id"], record["jd_id"]
+    os.makedirs(out_prefix, exist_ok=True)
+    pdf_report = f"{out_prefix}/{cand_id}__{jd_id}_report.pdf"
+    html_report = f"{out_prefix}/{cand_id}__{jd_id}_report.html"
+    chart_images = None
+    if charts and (pdf or html):
+        chart_images = render_skill_charts(record["resume_skills"], record["jd_skills"])
+
+    if pdf or html:
+        resume_text, jd_text = texts or record_texts(record)
+    feedback = record["llm_feedback"] + "\n\n" + record["ats_report"]
+    if pdf:
+        save_pdf_report(
+            pdf_report, resume_text, jd_text,
+            record["section_scores"], record["overall_score"], feedback, charts=chart_images
+        )
+    if html:
+        save_html_report(
+            html_report, resume_text, jd_text,
+            record["section_scores"], record["overall_score"], feedback, charts=chart_images
+        )
+    return pdf_report if pdf else html_report if html else ""
+
+def _render_file(path, out_prefix, stages):
+    return render_report(load_analysis(path), out_prefix, **stages)
+
+def render_reports(paths, out_prefix="outputs", min_score=None, workers=DEFAULT_WORKERS, **stages):
+    """
+    Render pass over stored analyses, in a process pool when workers > 1.
+    Pairs with an overall score below min_score are skipped. Returns {analysis path: report path}.
+    """
+    if min_score is not None:
+        paths = [path for path in paths if load_analysis(path)["overall_score"] >= min_score]
+    with worker_pool(workers) as pool:
+        if pool is None:
+            reports = [_render_file(path, out_prefix, stages) for path in paths]
+        else:
+            reports = list(pool.map(_render_file, paths, [out_prefix] * len(paths), [stages] * len(paths)))
+    return dict(zip(paths, reports))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render reports from stored pair analyses.")
+    parser.add_argument("paths", nargs="*", help="analysis JSON files (default: every file in <output-dir>/analysis)")
+    parser.add_argument("--output-dir", default="outputs", help="where reports are written (default: %(default)s)")
+    parser.add_argument("--resume", help="only pairs with this resume file name")
+    parser.add_argument("--jd", help="only pairs with this JD file name")
+    parser.add_argument("--min-score", type=float, help="skip pairs with a lower overall score")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="render processes (default: %(default)s)")
+    parser.add_argument("--skip-pdf", action="store_true", help="no PDF reports")
+    parser.add_argument("--skip-html", action="store_true", help="no HTML reports")
+    parser.add_argument("--skip-charts", action="store_true", help="no skill charts")
+    args = parser.parse_args(argv)
+
+    paths = args.paths or sorted(glob.glob(os.path.join(args.output_dir, ANALYSIS_DIR, "*.json")))
+    if args.resume or args.jd:
+        def wanted(record):
+            return args.resume in (None, record["resume_filename"]) and args.jd in (None, record["jd_filename"])
+        paths = [path for path in paths if wanted(load_analysis(path))]
+    reports = render_reports(
+        paths, args.output_dir, min_score=args.min_score, workers=args.workers,
+        charts=not args.skip_charts, pdf=not args.skip_pdf, html=not args.skip_html,
+    )
+    for report in reports.values():
+        print(f"Report written: {report}")
+    print(f"Rendered {len(reports)} of {len(paths)} stored analyses")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import os
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import pdf_utils
+from skill_extractor import build_skill_matcher
+
+# Worker processes for the CPU-bound stages (document preprocessing, report rendering); 1 = in-process
+DEFAULT_WORKERS = int(os.getenv("WORKERS", 1))
+
+def _init_worker():
+    """
+    Runs once in each worker process: OCR pages inline (the pool already spreads documents over
+    the cores), and load the spaCy pipeline and skill matcher before the first task.
+    """
+    pdf_utils.OCR_MAX_WORKERS = 1
+    build_skill_matcher()
+
+@contextmanager
+def worker_pool(workers=DEFAULT_WORKERS):
+    """
+    Process pool for the CPU-bound stages, or None when workers <= 1 (everything stays in-process).
+    On an error or Ctrl-C queued tasks are cancelled rather than run to completion.
+    """
+    if workers <= 1:
+        yield None
+        return
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        yield pool
+    except BaseException:
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown(wait=True)
@@ -1,25 +1,66 @@
+import os
 import pdfplumber
 import pytesseract
-from PIL import Image
-import io
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_text_from_pdf(pdf_path):
-    """Extracts all text from a PDF, using OCR if a page is image-based."""
-    all_text = ""
+# OCR render resolution: a number, or "auto" to adapt it to the page size
+DEFAULT_OCR_DPI = os.getenv("OCR_DPI", "300")
+# "auto" DPI: render so the longer page side is about this many pixels, within the bounds below
+OCR_TARGET_PIXELS = 3300  # ~300 DPI on US Letter / A4
+OCR_MIN_DPI = 150
+OCR_MAX_DPI = 300
+# OCR processes per PDF when max_workers isn't given (None: one per CPU). parallel_utils sets 1 in its
+# worker processes: documents are already OCR'd in parallel there, a nested pool per PDF would oversubscribe.
+OCR_MAX_WORKERS = None
+
+def resolve_ocr_dpi(page, ocr_dpi=DEFAULT_OCR_DPI):
+    """Pick the OCR render resolution for a page; "auto" scales it to the page size."""
+    if str(ocr_dpi).lower() != "auto":
+        return int(ocr_dpi)
+    longest_inches = max(page.width, page.height) / 72  # PDF units are points
+    return int(max(OCR_MIN_DPI, min(OCR_MAX_DPI, OCR_TARGET_PIXELS / longest_inches)))
+
+def _ocr_page(pdf_path, page_number, ocr_dpi):
+    """OCR one page. Runs in a worker process, so it opens the PDF itself."""
     with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
+        page = pdf.pages[page_number]
+        image = page.to_image(resolution=resolve_ocr_dpi(page, ocr_dpi)).original
+        return pytesseract.image_to_string(image.convert("RGB"))
+
+def extract_pdf_pages(pdf_path, ocr_dpi=DEFAULT_OCR_DPI, max_workers=None):
+    """
+    Extract text page by page: text-layer pages are read directly, image-only pages are
+    OCR'd in a process pool. Returns a list of (text, used_ocr) tuples in page order.
+    """
+    pages = []
+    ocr_pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_number, page in enumerate(pdf.pages):
             text = page.extract_text()
             if text and text.strip():
-                all_text += text + "\n"
+                pages.append((text, False))
             else:
-                # Handle scanned/image-based PDF page with OCR
-                image = page.to_image(resolution=300).original
-                pil_image = Image.open(io.BytesIO(image.convert("RGB").tobytes()))
-                text_ocr = pytesseract.image_to_string(pil_image)
-                all_text += text_ocr + "\n"
-    return all_text.strip()
+                pages.append(None)
+                ocr_pages.append(page_number)
 
-import os
+    if max_workers is None:
+        max_workers = OCR_MAX_WORKERS
+    if len(ocr_pages) == 1 or max_workers == 1:
+        # Not worth a pool
+        for page_number in ocr_pages:
+            pages[page_number] = (_ocr_page(pdf_path, page_number, ocr_dpi), True)
+    elif ocr_pages:
+        workers = min(len(ocr_pages), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_ocr_page, [pdf_path] * len(ocr_pages), ocr_pages, [ocr_dpi] * len(ocr_pages))
+            for page_number, text in zip(ocr_pages, results):
+                pages[page_number] = (text, True)
+    return pages
+
+def extract_text_from_pdf(pdf_path, ocr_dpi=DEFAULT_OCR_DPI, max_workers=None):
+    """Extracts all text from a PDF, using OCR if a page is image-based."""
+    pages = extract_pdf_pages(pdf_path, ocr_dpi=ocr_dpi, max_workers=max_workers)
+    return "\n".join(text for text, _ in pages).strip()
 
 def get_resume_text(resume_path):
     # Detect filetype from extension
@@ -0,0 +1,152 @@
+import os
+import json
+import numpy as np
+from llm_utils import estimate_tokens
+from interview_questions import build_interview_prompt
+from review_utils import REVIEW_SCHEMA
+
+DEFAULT_MAX_INPUT_TOKENS = 3000
+# Per-model prompt budgets (model_key -> max input tokens); smaller-context local models get less
+MODEL_MAX_INPUT_TOKENS = {
+    "phi3": 2500,
+    "phi3.5": 2500,
+    "mistral": 3000,
+    "llama3": 3000,
+    "deepseek-coder": 3000,
+    "qwen2.5-coder": 3000,
+}
+# Share of the excerpt budget the JD may use; the resume gets the rest
+JD_BUDGET_SHARE = 0.4
+
+def get_max_input_tokens(model_key=None):
+    """Input token budget for a model; LLM_MAX_INPUT_TOKENS overrides every model."""
+    override = os.getenv("LLM_MAX_INPUT_TOKENS")
+    if override:
+        return int(override)
+    return MODEL_MAX_INPUT_TOKENS.get(model_key, DEFAULT_MAX_INPUT_TOKENS)
+
+def _format_passages(doc, indices):
+    """Selected passages in document order, under their section headers."""
+    lines = []
+    current_section = None
+    for i in sorted(indices):
+        passage = doc["passages"][i]
+        if passage["section"] != current_section:
+            current_section = passage["section"]
+            if current_section:
+                lines.append(f"[{current_section.upper()}]")
+        lines.append(passage["text"])
+    if len(indices) < len(doc["passages"]):
+        lines.append("[...]")
+    return "\n".join(lines)
+
+def _select_within_budget(doc, order, budget):
+    """Greedily take passages in the given priority order while they fit in budget tokens."""
+    chosen, used = [], 0
+    for i in order:
+        cost = estimate_tokens(doc["passages"][i]["text"])
+        if used + cost <= budget:
+            chosen.append(i)
+            used += cost
+    return chosen
+
+def compact_document(doc, budget, relevance_vector=None):
+    """
+    The document text cut down to about budget tokens. Passages are ranked by similarity to
+    relevance_vector (e.g. the JD embedding) when given, otherwise kept in document order.
+    Documents that already fit are returned unchanged.
+    """
+    if estimate_tokens(doc["clean_text"]) <= budget or not doc["passages"]:
+        return doc["clean_text"]
+    if relevance_vector is not None and doc.get("passage_embeddings") is not None:
+        # Embeddings are unit length, so the dot product is the cosine similarity
+        order = np.argsort(-(doc["passage_embeddings"] @ relevance_vector), kind="stable")
+    else:
+        order = range(len(doc["passages"]))
+    return _format_passages(doc, _select_within_budget(doc, order, budget))
+
+def build_pair_context(resume_doc, jd_doc, overhead_tokens=0, model_key=None):
+    """
+    Token-budgeted resume and JD excerpts for one pair, shared by every prompt of that pair.
+    The most JD-relevant resume passages are kept; overhead_tokens is what the rest of
+    the prompt (scores, ATS report, instructions) already uses.
+    """
+    available = max(get_max_input_tokens(model_key) - overhead_tokens, 200)
+    jd_budget = min(estimate_tokens(jd_doc["clean_text"]), int(available * JD_BUDGET_SHARE))
+    jd_excerpt = compact_document(jd_doc, jd_budget)
+    resume_budget = available - estimate_tokens(jd_excerpt)
+    resume_excerpt = compact_document(resume_doc, resume_budget, relevance_vector=jd_doc["embedding"])
+    return {"resume": resume_excerpt, "jd": jd_excerpt}
+
+FEEDBACK_PROMPT_TEMPLATE = """
+Analyze this resume against the job description and provide detailed feedback.
+
+RESUME:
+{resume}
+
+JOB DESCRIPTION:
+{jd}
+
+SIMILARITY SCORES:
+- Overall Match: {overall_score:.3f}
+- Skills Match: {skills:.3f}
+- Education Match: {education:.3f}
+- Experience Match: {experience:.3f}
+- Project Experience Match: {project:.3f}
+
+ATS OPTIMIZATION REPORT:
+{ats_report}
+
+Matched skills: {matched}
+Missing (in JD, not in resume): {missing}
+Extra (in resume, not in JD): {extra}
+
+Please evaluate the resume and provide specific feedback for improvement.
+"""
+
+def build_feedback_prompt(context, overall_score, section_scores, ats_report, matched, missing, extra):
+    return FEEDBACK_PROMPT_TEMPLATE.format(
+        resume=context["resume"],
+        jd=context["jd"],
+        overall_score=overall_score,
+        skills=section_scores.get("skills", 0),
+        education=section_scores.get("education", 0),
+        experience=section_scores.get("experience", 0),
+        project=section_scores.get("project experience", 0),
+        ats_report=ats_report,
+        matched=", ".join(sorted(matched)),
+        missing=", ".join(sorted(missing)),
+        extra=", ".join(sorted(extra)),
+    )
+
+REVIEW_INSTRUCTIONS = """
+Also write {num_questions} highly relevant, technical, and practical interview questions for this candidate (avoid generic HR questions).
+
+Respond with only a JSON object matching this JSON schema:
+{schema}
+"""
+
+def build_review_prompt(context, overall_score, section_scores, ats_report, matched, missing, extra, num_questions=5):
+    """Single-call prompt: feedback and interview questions as one structured (JSON) response."""
+    return build_feedback_prompt(
+        context, overall_score, section_scores, ats_report, matched, missing, extra
+    ) + REVIEW_INSTRUCTIONS.format(num_questions=num_questions, schema=json.dumps(REVIEW_SCHEMA))
+
+def build_pair_prompts(resume_doc, jd_doc, overall_score, section_scores, ats_report,
+                       matched, missing, extra, model_key=None, num_questions=5):
+    """Feedback, interview-question and single-call review prompts for a pair, built on one compacted context."""
+    empty = {"resume": "", "jd": ""}
+    overhead = estimate_tokens(build_review_prompt(
+        empty, overall_score, section_scores, ats_report, matched, missing, extra, num_questions
+    ))
+    context = build_pair_context(resume_doc, jd_doc, overhead_tokens=overhead, model_key=model_key)
+    return {
+        "context": context,
+        "feedback_prompt": build_feedback_prompt(
+            context, overall_score, section_scores, ats_report, matched, missing, extra
+        ),
+        "interview_prompt": build_interview_prompt(context["resume"], context["jd"], num_questions),
+        "review_prompt": build_review_prompt(
+            context, overall_score, section_scores, ats_report, matched, missing, extra, num_questions
+        ),
+    }
@@ -1,30 +1,195 @@
+import os
+import glob
+import argparse
+import numpy as np
 import pandas as pd
+from results_store import ResultsStore, DEFAULT_RESULTS_PATH
 
-# Load your batch summary
-df = pd.read_csv("outputs/batch_matrix.csv")
+# Ties on the ranking score are broken by these columns in order: numbers higher first, text ascending.
+# resume_filename last makes every JD's order total, and the same whichever shard a pair is stored in.
+DEFAULT_TIE_BREAKERS = ("ats_composite_score", "resume_filename")
+# The threshold pass pads scores into a (JDs x largest JD) matrix up to this multiple of the row count
+MAX_PADDING = 4
 
 # --- Ranking Logic ---
 
+def composite_score(df, weights):
+    """Weighted mean of score columns ({column: weight}); a missing score counts as 0."""
+    score = np.zeros(len(df))
+    for column, weight in weights.items():
+        score += weight * np.nan_to_num(df[column].to_numpy(dtype=np.float64))
+    return score / sum(weights.values())
+
+def _sort_key(values):
+    """Ascending lexsort key for a tie-breaker column: numbers negated (higher first, missing last), text as sorted codes."""
+    if pd.api.types.is_numeric_dtype(values):
+        values = values.to_numpy(dtype=np.float64)
+        return np.where(np.isnan(values), np.inf, -values)
+    return pd.factorize(values.astype(str), sort=True)[0]
+
+def _thresholds(scores, codes, quotas):
+    """
+    Each JD's quota-th best score, from one partition over the padded score matrix: rows below it
+    can't make the cut. -inf when a JD has fewer rows than its quota (or the padding would be too big), +inf for a quota of 0.
+    """
+    thresholds = np.full(len(quotas), -np.inf)
+    sizes = np.bincount(codes, minlength=len(quotas))
+    width = int(sizes.max()) if len(sizes) else 0
+    q_max = min(int(quotas.max()), width) if len(quotas) else 0
+    if q_max > 0 and len(quotas) * width <= MAX_PADDING * len(scores):
+        # Stable grouping by JD; small integer codes get numpy's radix sort
+        order = np.argsort(codes.astype(np.int16 if len(quotas) < 2 ** 15 else np.int32), kind="stable")
+        grouped = codes[order]
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        padded = np.full((len(quotas), width), -np.inf)
+        padded[grouped, np.arange(len(order)) - starts[grouped]] = scores[order]
+        best = np.sort(np.partition(padded, width - q_max, axis=1)[:, width - q_max:], axis=1)
+        quota = np.minimum(quotas, q_max)
+        ranked = quota > 0
+        thresholds[ranked] = best[ranked, q_max - quota[ranked]]
+    thresholds[quotas == 0] = np.inf
+    return thresholds
+
+def rank_candidates(df, score_col="overall_score", weights=None, top_n=3, quotas=None,
+                    tie_breakers=DEFAULT_TIE_BREAKERS):
+    """
+    Top candidates per JD in one vectorized pass over a results frame (results_store.ResultsStore.load_scores).
+    With weights ({column: weight}) their weighted mean is ranked and stored as score_col
+    (e.g. "composite_score"); otherwise score_col itself is ranked. top_n is every JD's quota,
+    quotas ({jd_filename: n}) overrides it per JD. Returns the kept rows by JD and rank, with a 1-based "rank" column.
+    """
+    if weights:
+        scores = composite_score(df, weights)
+    else:
+        scores = df[score_col].to_numpy(dtype=np.float64)
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    codes, jd_names = pd.factorize(df["jd_filename"], sort=True)
+    quota = np.full(len(jd_names), top_n, dtype=np.int64)
+    if quotas:
+        quota = pd.Series(np.asarray(jd_names)).map(quotas).fillna(top_n).to_numpy(dtype=np.int64)
+
+    # Cheap threshold pass first, so the exact sort with tie-breakers only sees rows that can make the cut
+    candidates = np.flatnonzero(scores >= _thresholds(scores, codes, quota)[codes])
+    keys = [_sort_key(df[column].iloc[candidates]) for column in reversed(tie_breakers)
+            if column in df.columns and column != score_col]
+    order = candidates[np.lexsort(keys + [-scores[candidates], codes[candidates]])]
+    grouped = codes[order]
+    ranks = np.arange(len(order)) - np.searchsorted(grouped, grouped) + 1
+    keep = ranks <= quota[grouped]
+
+    ranked = df.iloc[order[keep]].copy()
+    if weights:
+        ranked[score_col] = scores[order[keep]]
+    ranked["rank"] = ranks[keep]
+    return ranked
+
+def rank_partitions(frames, **ranking):
+    """
+    rank_candidates over a results table split into parts (score frames with a "results_path"
+    column): each part's top candidates per JD are kept, then ranked together. frames may be a
+    generator, so only one part needs to be in memory at a time.
+    """
+    partial = [rank_candidates(frame, **ranking) for frame in frames]
+    if len(partial) <= 1:
+        return partial[0] if partial else pd.DataFrame(columns=["pair_id", "jd_filename", "results_path", "rank"])
+    return rank_candidates(pd.concat(partial, ignore_index=True).drop(columns="rank"), **ranking)
+
+def rank_results(paths, **ranking):
+    """
+    rank_candidates over several results databases (e.g. the shards of a sharded batch), loading
+    one at a time. The source database is in the "results_path" column (pair ids are per database).
+    """
+    return rank_partitions(
+        (ResultsStore(path, readonly=True).load_scores().assign(results_path=path) for path in paths), **ranking
+    )
+
 def rank_best_per_jd(df, score_col="overall_score", top_n=3):
-    ranked = []
-    for jd in df["jd_filename"].unique():
-        jd_sub = df[df["jd_filename"] == jd]
-        sorted_sub = jd_sub.sort_values(score_col, ascending=False).head(top_n)
-        ranked.append(sorted_sub)
-    return pd.concat(ranked)
-
-# Run the ranking
-top_n = 3
-score_col = "overall_score"  # (You could prompt user for ATS or overall)
-finalists = rank_best_per_jd(df, score_col=score_col, top_n=top_n)
-
-print("--- Top Candidates per JD ---\n")
-for jd in df["jd_filename"].unique():
-    print(f"== {jd} ==")
-    best = finalists[finalists["jd_filename"] == jd]
-    print(best[["resume_filename", score_col, "ats_composite_score", "report_path"]])
-    print()
-
-# Save as a new CSV and/or Excel for easy sharing
-finalists.to_csv("outputs/top_candidates_per_jd.csv", index=False)
-print("Best-fit list saved as outputs/top_candidates_per_jd.csv")
+    return rank_candidates(df, score_col=score_col, top_n=top_n)
+
+def rank_score_matrix(scores, resume_names, jd_names, score_col="overall_score", top_n=3):
+    """
+    Top-N resumes per JD straight from a (num_resumes x num_jds) similarity matrix,
+    e.g. one entry of document_utils.score_documents, without building the full pair table.
+    """
+    scores = np.asarray(scores)
+    top_n = min(top_n, scores.shape[0])
+    order = np.argsort(-scores, axis=0, kind="stable")[:top_n]  # (top_n x num_jds)
+    jd_idx = np.broadcast_to(np.arange(scores.shape[1]), order.shape)
+    return pd.DataFrame({
+        "jd_filename": np.asarray(jd_names)[jd_idx.T.ravel()],
+        "resume_filename": np.asarray(resume_names)[order.T.ravel()],
+        score_col: scores[order, jd_idx].T.ravel(),
+        "rank": np.tile(np.arange(1, top_n + 1), scores.shape[1]),
+    })
+
+def rank_documents(resume_docs, jd_docs, score_key="overall", top_n=3):
+    """Rank preprocessed document artifacts (document_utils.build_documents) by a score matrix."""
+    from document_utils import score_documents, SCORE_COLUMNS
+    scores = score_documents(resume_docs, jd_docs)
+    return rank_score_matrix(
+        scores[score_key],
+        [doc["filename"] for doc in resume_docs],
+        [doc["filename"] for doc in jd_docs],
+        score_col=SCORE_COLUMNS[score_key],
+        top_n=top_n,
+    )
+
+def _parse_pairs(text, value_type):
+    """ "a=1,b=2" -> {"a": 1, "b": 2} """
+    pairs = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, value = item.rpartition("=")
+        pairs[name.strip()] = value_type(value)
+    return pairs
+
+def default_results_paths(out_prefix="outputs"):
+    """The per-shard databases of a sharded batch when there are any, else the batch results database if it exists."""
+    shards = sorted(glob.glob(os.path.join(out_prefix, "batch_results_shard*.sqlite3")))
+    if shards:
+        return shards
+    single = os.path.join(out_prefix, os.path.basename(DEFAULT_RESULTS_PATH))
+    return [single] if os.path.exists(single) else []
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank the best candidates per job description.")
+    parser.add_argument("results", nargs="*",
+                        help="results databases (default: the shards in outputs/, or outputs/batch_results.sqlite3)")
+    parser.add_argument("--score", default="overall_score", help="score column to rank by (default: %(default)s)")
+    parser.add_argument("--weights", type=lambda text: _parse_pairs(text, float),
+                        help="rank by a weighted mean instead, e.g. overall_score=0.6,ats_composite_score=0.4")
+    parser.add_argument("--top-n", type=int, default=3, help="candidates per JD (default: %(default)s)")
+    parser.add_argument("--quota", type=lambda text: _parse_pairs(text, int), default={},
+                        help="per-JD candidate counts overriding --top-n, e.g. backend.txt=10,intern.txt=1")
+    parser.add_argument("--tie-breakers", type=lambda text: tuple(filter(None, text.split(","))),
+                        default=DEFAULT_TIE_BREAKERS, help="columns that break score ties (default: %(default)s)")
+    parser.add_argument("--output", default="outputs/top_candidates_per_jd.csv", help="CSV file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    paths = args.results or default_results_paths()
+    if not paths:
+        parser.error("no results databases in outputs/; pass their paths")
+    score_col = "composite_score" if args.weights else args.score
+    finalists = rank_results(
+        paths, score_col=score_col, weights=args.weights,
+        top_n=args.top_n, quotas=args.quota, tie_breakers=args.tie_breakers,
+    )
+    report_paths = pd.concat(
+        [ResultsStore(path, readonly=True).load_details(rows["pair_id"], ["report_path"]).assign(results_path=path).reset_index()
+         for path, rows in finalists.groupby("results_path", sort=False)]
+    ) if len(finalists) else pd.DataFrame(columns=["pair_id", "report_path", "results_path"])
+    finalists = finalists.merge(report_paths, on=["results_path", "pair_id"], how="left")
+
+    print("--- Top Candidates per JD ---\n")
+    for jd, best in finalists.groupby("jd_filename", sort=False, observed=True):
+        print(f"== {jd} ==")
+        print(best[["rank", "resume_filename", score_col, "ats_composite_score", "report_path"]].to_string(index=False))
+        print()
+
+    # Save as a new CSV for easy sharing
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    finalists.drop(columns="results_path").to_csv(args.output, index=False)
+    print(f"Best-fit list saved as {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,70 @@
+import io
+import os
+import base64
+import tempfile
+from html import escape
+from functools import lru_cache
 from fpdf import FPDF
 
-def save_pdf_report(path, resume_text, job_desc, section_scores, overall_score, llm_feedback):
-    # Clean text to handle unicode characters
-    def clean_text_for_pdf(text):
-        # Replace common unicode characters
-        replacements = {
-            '\u2013': '-',  # en dash
-            '\u2014': '--', # em dash  
-            '\u2018': "'",  # left single quote
-            '\u2019': "'",  # right single quote
-            '\u201c': '"',  # left double quote
-            '\u201d': '"',  # right double quote
-            '\u2022': '*',  # bullet point
-            '\u00a0': ' ',  # non-breaking space
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        # Remove any remaining non-latin1 characters
-        return text.encode('latin1', 'ignore').decode('latin1')
-    
-    # Clean all input texts
-    resume_text = clean_text_for_pdf(resume_text)
-    job_desc = clean_text_for_pdf(job_desc)
-    llm_feedback = clean_text_for_pdf(llm_feedback)
-    
+# Unicode punctuation the core PDF fonts lack -> latin-1 stand-ins; anything else non-latin-1 is dropped
+PDF_TRANSLATION = str.maketrans({
+    '\u2013': '-',  # en dash
+    '\u2014': '--', # em dash
+    '\u2018': "'",  # left single quote
+    '\u2019': "'",  # right single quote
+    '\u201c': '"',  # left double quote
+    '\u201d': '"',  # right double quote
+    '\u2022': '*',  # bullet point
+    '\u00a0': ' ',  # non-breaking space
+})
+# Font and line height of the long text blocks (resume, JD, feedback)
+PDF_TEXT_FONT = ("Arial", "", 10)
+PDF_LINE_HEIGHT = 8
+
+def sanitize_for_pdf(text):
+    return text.translate(PDF_TRANSLATION).encode('latin1', 'ignore').decode('latin1')
+
+# Page used only to measure text, so wrapping matches the report pages
+_layout_pdf = None
+
+def wrap_for_pdf(text):
+    """Sanitize text and break it into the lines multi_cell would print on a report page."""
+    global _layout_pdf
+    if _layout_pdf is None:
+        _layout_pdf = FPDF()
+        _layout_pdf.add_page()
+        _layout_pdf.set_font(*PDF_TEXT_FONT)
+    return _layout_pdf.multi_cell(0, PDF_LINE_HEIGHT, sanitize_for_pdf(text), align='L', split_only=True)
+
+@lru_cache(maxsize=64)
+def _jd_pdf_lines(job_desc):
+    # The JD is the same in every report for that JD: wrap it once
+    return tuple(wrap_for_pdf(job_desc))
+
+def _write_lines(pdf, lines):
+    pdf.set_font(*PDF_TEXT_FONT)
+    for line in lines:
+        pdf.cell(0, PDF_LINE_HEIGHT, line, ln=True)
+
+def _add_png(pdf, png_bytes, w):
+    """Place an in-memory PNG on the page."""
+    try:
+        pdf.image(io.BytesIO(png_bytes), type="png", w=w)  # fpdf2 reads images from buffers
+    except AttributeError:
+        # PyFPDF 1.7 only reads image files: use a private temp file, so concurrent reports can't collide
+        fd, tmp_path = tempfile.mkstemp(suffix=".png")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(png_bytes)
+            pdf.image(tmp_path, w=w)
+        finally:
+            os.remove(tmp_path)
+
+def save_pdf_report(path, resume_text, job_desc, section_scores, overall_score, llm_feedback, charts=None):
+    """
+    Texts may contain any unicode; they are sanitized for the latin-1 PDF fonts here.
+    charts: optional {"venn": png bytes, "bar": png bytes} (visualization_utils.render_skill_charts).
+    """
     pdf = FPDF()
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -35,14 +76,12 @@ def save_pdf_report(path, resume_text, job_desc, section_scores, overall_score,
 
     pdf.set_font("Arial", style='B', size=12)
     pdf.cell(0, 10, "Resume (Extracted & Cleaned):", ln=True)
-    pdf.set_font("Arial", size=10)
-    pdf.multi_cell(0, 8, resume_text)
+    _write_lines(pdf, wrap_for_pdf(resume_text))
     pdf.ln(5)
 
     pdf.set_font("Arial", style='B', size=12)
     pdf.cell(0, 10, "Job Description:", ln=True)
-    pdf.set_font("Arial", size=10)
-    pdf.multi_cell(0, 8, job_desc)
+    _write_lines(pdf, _jd_pdf_lines(job_desc))
     pdf.ln(5)
     
     pdf.set_font("Arial", style='B', size=12)
@@ -55,31 +94,47 @@ def save_pdf_report(path, resume_text, job_desc, section_scores, overall_score,
     
     pdf.set_font("Arial", style='B', size=12)
     pdf.cell(0, 10, "AI-Powered Feedback:", ln=True)
-    pdf.set_font("Arial", size=10)
-    pdf.multi_cell(0, 8, llm_feedback)
+    _write_lines(pdf, wrap_for_pdf(llm_feedback))
 
-    pdf.add_page()
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(0, 10, "Skill Gap Visualizations", ln=True)
-    pdf.image("outputs/skill_venn.png", w=100)
-    pdf.image("outputs/skill_bar.png", w=100)
+    if charts:
+        pdf.add_page()
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(0, 10, "Skill Gap Visualizations", ln=True)
+        _add_png(pdf, charts["venn"], w=100)
+        _add_png(pdf, charts["bar"], w=100)
 
     pdf.output(path)
 
-def save_html_report(path, resume_text, job_desc, section_scores, overall_score, llm_feedback):
-    html = "<html><head><title>Resume Reviewer Report</title></head><body>"
-    html += "<h2>Resume Reviewer Report</h2>"
+HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Resume Reviewer Report</title></head><body>
+<h2>Resume Reviewer Report</h2>
+"""
+HTML_TEXT_SECTION = "<h3>{title}</h3><pre>{text}</pre>\n"
+HTML_TAIL = "</body></html>\n"
 
-    html += "<h3>Resume (Extracted & Cleaned):</h3><pre>{}</pre>".format(resume_text)
-    html += "<h3>Job Description:</h3><pre>{}</pre>".format(job_desc)
-    html += "<h3>Section-wise Similarity Scores:</h3><ul>"
-    for sec, sc in section_scores.items():
-        html += "<li><b>{}</b>: {:.3f}</li>".format(sec.capitalize(), sc)
-    html += "<li><b>Overall</b>: {:.3f}</li>".format(overall_score)
-    html += "</ul>"
-    html += "<h3>AI-Powered Feedback:</h3><pre>{}</pre>".format(llm_feedback)
-    html += "</body></html>"
-    html += '<img src="outputs/skill_venn.png">'
-    
+@lru_cache(maxsize=64)
+def _jd_html_section(job_desc):
+    # Escaped once per JD, shared by every candidate's report
+    return HTML_TEXT_SECTION.format(title="Job Description:", text=escape(job_desc))
+
+def save_html_report(path, resume_text, job_desc, section_scores, overall_score, llm_feedback, charts=None):
+    """
+    Streams the report into the file section by section; all text is HTML-escaped.
+    charts: optional {"venn": png bytes, "bar": png bytes}, embedded inline as data URIs.
+    """
     with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
+        f.write(HTML_HEAD)
+        f.write(HTML_TEXT_SECTION.format(title="Resume (Extracted &amp; Cleaned):", text=escape(resume_text)))
+        f.write(_jd_html_section(job_desc))
+        f.write("<h3>Section-wise Similarity Scores:</h3><ul>\n")
+        for sec, sc in section_scores.items():
+            f.write("<li><b>{}</b>: {:.3f}</li>\n".format(escape(sec.capitalize()), sc))
+        f.write("<li><b>Overall</b>: {:.3f}</li>\n</ul>\n".format(overall_score))
+        f.write(HTML_TEXT_SECTION.format(title="AI-Powered Feedback:", text=escape(llm_feedback)))
+        if charts:
+            f.write("<h3>Skill Gap Visualizations:</h3>\n")
+            for name in ("venn", "bar"):
+                f.write('<img src="data:image/png;base64,')
+                f.write(base64.b64encode(charts[name]).decode("ascii"))
+                f.write('">\n')
+        f.write(HTML_TAIL)
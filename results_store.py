@@ -0,0 +1,228 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+DEFAULT_RESULTS_PATH = os.path.join("outputs", "batch_results.sqlite3")
+
+# Typed numeric per-pair columns, loaded together for ranking, filtering and dashboard tables
+SCORE_COLUMNS = [
+    "overall_score", "skills_score", "education_score", "project_score", "experience_score",
+    "ats_composite_score", "ats_keyword_coverage",
+]
+# Everything else is text, kept in its own table and only loaded for the pairs being shown
+TEXT_COLUMNS = [
+    "model_provider", "model_key",
+    "matched_skills", "missing_skills", "extra_skills",
+    "ats_sections_found", "ats_sections_missing", "ats_format_issues",
+    "interview_questions", "resume_format_suggestions",
+    "report_path", "analysis_path",
+]
+# Column order of the CSV export (the old batch_matrix.csv layout, plus analysis_path)
+RESULT_COLUMNS = [
+    "resume_filename", "jd_filename", "model_provider", "model_key",
+    "overall_score", "skills_score", "education_score", "project_score", "experience_score",
+    "matched_skills", "missing_skills", "extra_skills",
+    "ats_composite_score", "ats_keyword_coverage",
+    "ats_sections_found", "ats_sections_missing", "ats_format_issues",
+    "interview_questions", "resume_format_suggestions",
+    "report_path", "analysis_path",
+]
+
+class ResultsStore:
+    """
+    Batch results in SQLite: a typed scores table (file names + numeric scores, indexed by
+    resume and JD) and a separate table of text columns, joined on pair_id. Rows are dicts
+    keyed by RESULT_COLUMNS. Appends are batched into transactions; pass commit=True to make
+    one durable immediately.
+
+    Row-by-row reads of a large SQLite table are slow, so the score columns are also kept as
+    a columnar NumPy snapshot next to the database (<path>.scores.npz), rewritten on close()
+    and used by load_scores() while it matches the database revision.
+    """
+
+    def __init__(self, path=DEFAULT_RESULTS_PATH, commit_every=500, readonly=False):
+        """readonly=True opens an existing database for reading only (FileNotFoundError if there is none)."""
+        self.path = path
+        self.snapshot_path = os.path.splitext(path)[0] + ".scores.npz"
+        self.commit_every = commit_every
+        self.readonly = readonly
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        if readonly:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"no results database at {path}")
+            self._conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False)
+            return
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores (pair_id INTEGER PRIMARY KEY, resume_filename TEXT, jd_filename TEXT, "
+            + ", ".join(f"{name} REAL" for name in SCORE_COLUMNS) + ")"
+        )
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS details (pair_id INTEGER PRIMARY KEY, {', '.join(TEXT_COLUMNS)})"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scores_jd ON scores(jd_filename)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scores_resume ON scores(resume_filename)")
+        # Bumped on every commit that changed rows; tells readers whether the snapshot is current
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('revision', 0)")
+        self._conn.commit()
+
+    def _insert(self, row):
+        cur = self._conn.execute(
+            f"INSERT INTO scores (resume_filename, jd_filename, {', '.join(SCORE_COLUMNS)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(SCORE_COLUMNS))})",
+            [row["resume_filename"], row["jd_filename"]] + [row.get(name) for name in SCORE_COLUMNS],
+        )
+        self._conn.execute(
+            f"INSERT INTO details (pair_id, {', '.join(TEXT_COLUMNS)}) VALUES (?, {', '.join('?' * len(TEXT_COLUMNS))})",
+            [cur.lastrowid] + [row.get(name) for name in TEXT_COLUMNS],
+        )
+
+    def _commit(self):
+        """Commit pending rows (lock held)."""
+        if self._uncommitted:
+            self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def replace_all(self, rows=()):
+        """Drop every stored row and insert rows instead, in one transaction."""
+        with self._lock:
+            self._conn.execute("DELETE FROM scores")
+            self._conn.execute("DELETE FROM details")
+            for row in rows:
+                self._insert(row)
+            self._uncommitted += 1
+            self._commit()
+
+    def append(self, row, commit=False):
+        with self._lock:
+            self._insert(row)
+            self._uncommitted += 1
+            if commit or self._uncommitted >= self.commit_every:
+                self._commit()
+
+    def update_details(self, pair_id, **values):
+        """Change text columns of one stored pair, e.g. its report_path after an on-demand render."""
+        unknown = set(values) - set(TEXT_COLUMNS)
+        if unknown:
+            raise ValueError(f"not a text column: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE details SET {', '.join(f'{name} = ?' for name in values)} WHERE pair_id = ?",
+                list(values.values()) + [int(pair_id)],
+            )
+            self._conn.commit()
+
+    def commit(self):
+        with self._lock:
+            self._commit()
+
+    def close(self, snapshot=True):
+        """Commit, refresh the score snapshot (unless snapshot=False or read-only) and close the database."""
+        if not self.readonly:
+            with self._lock:
+                self._commit()
+            if snapshot:
+                self.write_snapshot()
+        with self._lock:
+            self._conn.close()
+
+    def _revision(self):
+        return self._conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    def write_snapshot(self):
+        """Write the scores table as columns: file names dictionary-encoded, scores as float64 (NaN for NULL)."""
+        with self._lock:
+            revision = self._revision()
+            rows = self._conn.execute(
+                f"SELECT pair_id, resume_filename, jd_filename, {', '.join(SCORE_COLUMNS)} FROM scores ORDER BY pair_id"
+            ).fetchall()
+        columns = list(zip(*rows)) if rows else [()] * (3 + len(SCORE_COLUMNS))
+        resume_codes, resume_names = pd.factorize(pd.Series(columns[1], dtype=object))
+        jd_codes, jd_names = pd.factorize(pd.Series(columns[2], dtype=object))
+        arrays = {name: np.array(values, dtype=np.float64) for name, values in zip(SCORE_COLUMNS, columns[3:])}
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path, revision=revision, pair_id=np.array(columns[0], dtype=np.int64),
+            resume_code=resume_codes.astype(np.int32), resume_names=np.array(resume_names, dtype=str),
+            jd_code=jd_codes.astype(np.int32), jd_names=np.array(jd_names, dtype=str), **arrays,
+        )
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _load_snapshot(self):
+        """Score columns from the snapshot, or None when it is missing or older than the database."""
+        try:
+            with np.load(self.snapshot_path) as snapshot:
+                with self._lock:
+                    if int(snapshot["revision"]) != self._revision():
+                        return None
+                frame = pd.DataFrame({
+                    "pair_id": snapshot["pair_id"],
+                    "resume_filename": pd.Categorical.from_codes(snapshot["resume_code"], snapshot["resume_names"]),
+                    "jd_filename": pd.Categorical.from_codes(snapshot["jd_code"], snapshot["jd_names"]),
+                    **{name: snapshot[name] for name in SCORE_COLUMNS},
+                })
+        except (OSError, KeyError, ValueError):
+            return None
+        return frame
+
+    def _where(self, jd_filename=None, resume_filename=None):
+        clauses, params = [], []
+        if jd_filename is not None:
+            clauses.append("jd_filename = ?")
+            params.append(jd_filename)
+        if resume_filename is not None:
+            clauses.append("resume_filename = ?")
+            params.append(resume_filename)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def load_scores(self, jd_filename=None, resume_filename=None):
+        """
+        pair_id, file names and score columns as a DataFrame, optionally for one JD and/or resume.
+        Unfiltered loads come from the columnar snapshot when it is current; filtered ones use the indexes.
+        """
+        if jd_filename is None and resume_filename is None:
+            frame = self._load_snapshot()
+            if frame is not None:
+                return frame
+        where, params = self._where(jd_filename, resume_filename)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT pair_id, resume_filename, jd_filename, {', '.join(SCORE_COLUMNS)} FROM scores{where} "
+                "ORDER BY pair_id", params
+            ).fetchall()
+        return pd.DataFrame(rows, columns=["pair_id", "resume_filename", "jd_filename"] + SCORE_COLUMNS)
+
+    def load_details(self, pair_ids, columns=TEXT_COLUMNS):
+        """Text columns for the given pairs, indexed by pair_id."""
+        pair_ids = [int(pair_id) for pair_id in pair_ids]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT pair_id, {', '.join(columns)} FROM details "
+                f"WHERE pair_id IN ({', '.join('?' * len(pair_ids))})", pair_ids
+            ).fetchall() if pair_ids else []
+        return pd.DataFrame(rows, columns=["pair_id"] + list(columns)).set_index("pair_id")
+
+    def load_results(self, jd_filename=None, resume_filename=None):
+        """Every column, in RESULT_COLUMNS order (what batch_matrix.csv used to hold)."""
+        where, params = self._where(jd_filename, resume_filename)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(RESULT_COLUMNS)} FROM scores JOIN details USING (pair_id){where} ORDER BY pair_id",
+                params,
+            ).fetchall()
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+    def export_csv(self, path):
+        self.load_results().to_csv(path, index=False)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
@@ -0,0 +1,90 @@
+import os
+import numpy as np
+from document_utils import stack_embeddings
+
+# Resumes per JD that get the full analysis (LLM feedback, reports); 0 = every resume
+DEFAULT_TOP_K = int(os.getenv("SHORTLIST_TOP_K", 50))
+# Weight of JD skill coverage relative to embedding similarity in the shortlist score
+SKILL_WEIGHT = float(os.getenv("SHORTLIST_SKILL_WEIGHT", 0.3))
+# Resume pools at least this large use an HNSW index (when hnswlib is installed)
+ANN_MIN_POOL = int(os.getenv("SHORTLIST_ANN_MIN_POOL", 5000))
+# The ANN stage fetches this many times top_k candidates before the skill-overlap rerank
+ANN_OVERFETCH = 4
+
+class ResumeIndex:
+    """
+    Nearest-neighbour index over resume embeddings (unit-length rows, so inner product = cosine).
+    Exact NumPy search by default; an HNSW graph for large pools when hnswlib is available.
+    """
+
+    def __init__(self, vectors, use_ann=None):
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+        if use_ann is None:
+            use_ann = len(self.vectors) >= ANN_MIN_POOL
+        self._hnsw = self._build_hnsw() if use_ann and len(self.vectors) else None
+
+    def _build_hnsw(self):
+        try:
+            import hnswlib
+        except ImportError:
+            print("hnswlib not installed, using exact search")
+            return None
+        index = hnswlib.Index(space="ip", dim=self.vectors.shape[1])
+        index.init_index(max_elements=len(self.vectors), ef_construction=200, M=16)
+        index.add_items(self.vectors, np.arange(len(self.vectors)))
+        return index
+
+    @property
+    def kind(self):
+        return "hnsw" if self._hnsw is not None else "exact"
+
+    def search(self, queries, k):
+        """Top-k resume indices per query row, best first. Returns (indices, similarities), each (num_queries x k)."""
+        queries = np.asarray(queries, dtype=np.float32)
+        k = min(k, len(self.vectors))
+        if self._hnsw is not None:
+            self._hnsw.set_ef(max(2 * k, 50))
+            labels, distances = self._hnsw.knn_query(queries, k=k)
+            return labels.astype(np.int64), 1.0 - distances  # hnswlib "ip" distance is 1 - dot product
+        sims = queries @ self.vectors.T
+        # argpartition keeps this O(n) per JD; only the k survivors get sorted
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_sims, order, axis=1)
+
+def skill_coverage_matrix(resume_docs, jd_docs):
+    """Share of each JD's skills found in each resume, as a (num_resumes x num_jds) matrix."""
+    vocab = sorted(set().union(*(doc["skills"] for doc in resume_docs + jd_docs)))
+    position = {skill: i for i, skill in enumerate(vocab)}
+    def one_hot(docs):
+        matrix = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+        for row, doc in enumerate(docs):
+            matrix[row, [position[s] for s in doc["skills"]]] = 1.0
+        return matrix
+    resume_matrix, jd_matrix = one_hot(resume_docs), one_hot(jd_docs)
+    jd_sizes = np.maximum(jd_matrix.sum(axis=1), 1.0)
+    return (resume_matrix @ jd_matrix.T) / jd_sizes
+
+def shortlist_candidates(resume_docs, jd_docs, top_k=DEFAULT_TOP_K, skill_weight=SKILL_WEIGHT, index=None):
+    """
+    Retrieval stage: the top_k resumes per JD by embedding similarity plus skill_weight x JD skill coverage.
+    Returns a (num_resumes x num_jds) boolean mask of shortlisted pairs.
+    """
+    mask = np.zeros((len(resume_docs), len(jd_docs)), dtype=bool)
+    if not resume_docs or not jd_docs:
+        return mask
+    if not top_k or top_k >= len(resume_docs):
+        mask[:] = True
+        return mask
+    if index is None:
+        index = ResumeIndex(stack_embeddings(resume_docs))
+    # Pull a wider pool by cosine alone (all resumes for exact search), then rerank with skill coverage
+    pool = len(resume_docs) if index.kind == "exact" else min(len(resume_docs), top_k * ANN_OVERFETCH)
+    candidates, sims = index.search(stack_embeddings(jd_docs), pool)
+    coverage = skill_coverage_matrix(resume_docs, jd_docs)
+    for j in range(len(jd_docs)):
+        combined = sims[j] + skill_weight * coverage[candidates[j], j]
+        best = np.argsort(-combined, kind="stable")[:top_k]
+        mask[candidates[j, best], j] = True
+    return mask
@@ -0,0 +1,103 @@
+import json
+from llm_utils import generate_feedback, is_error_response
+
+# JSON schema of the single-call review response
+REVIEW_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "strengths": {"type": "array", "items": {"type": "string"}},
+        "weaknesses": {"type": "array", "items": {"type": "string"}},
+        "suggestions": {"type": "array", "items": {"type": "string"}},
+        "interview_questions": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["strengths", "weaknesses", "suggestions", "interview_questions"],
+}
+
+REPAIR_PROMPT_TEMPLATE = """{prompt}
+
+Your previous response could not be used: {error}
+
+Previous response:
+{response}
+
+Return only a JSON object that matches this JSON schema, with no other text:
+{schema}
+It must contain exactly {num_questions} interview questions.
+"""
+
+def _extract_json(text):
+    """The JSON object in a response, tolerating code fences or chatter around it."""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("response contains no JSON object")
+    return json.loads(text[start:end + 1])
+
+def parse_review(text, num_questions=5, strict=True):
+    """
+    Parse and validate a structured review response against REVIEW_SCHEMA.
+    Returns the review dict (extra interview questions are dropped); raises ValueError describing
+    the first problem found, including fewer than num_questions questions unless strict=False.
+    """
+    try:
+        review = _extract_json(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e})")
+    if not isinstance(review, dict):
+        raise ValueError("top-level value is not an object")
+    cleaned = {}
+    for field in REVIEW_SCHEMA["required"]:
+        value = review.get(field)
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise ValueError(f"'{field}' must be a list of strings")
+        cleaned[field] = [item.strip() for item in value if item.strip()]
+    if strict and len(cleaned["interview_questions"]) < num_questions:
+        raise ValueError(
+            f"'interview_questions' has {len(cleaned['interview_questions'])} questions, expected {num_questions}"
+        )
+    cleaned["interview_questions"] = cleaned["interview_questions"][:num_questions]
+    return cleaned
+
+def _lenient_review(response, num_questions):
+    """The response parsed without the question count, or None when it doesn't fit the schema at all."""
+    try:
+        return parse_review(response, num_questions, strict=False)
+    except ValueError:
+        return None
+
+def generate_review(prompt, provider="local", model_key="llama3", num_questions=5, generate=generate_feedback):
+    """
+    One structured LLM call for the whole review, plus one repair retry if the response
+    doesn't validate. Returns (review dict or None, raw response text); a failed call isn't retried.
+    When neither response has all num_questions questions, the schema-valid one with the most is used.
+    """
+    response = generate(prompt, provider=provider, model_key=model_key, json_mode=True)
+    if is_error_response(response):
+        return None, response
+    try:
+        return parse_review(response, num_questions), response
+    except ValueError as e:
+        repair_prompt = REPAIR_PROMPT_TEMPLATE.format(
+            prompt=prompt, error=e, response=response, schema=json.dumps(REVIEW_SCHEMA), num_questions=num_questions
+        )
+    candidates = [(_lenient_review(response, num_questions), response)]
+    response = generate(repair_prompt, provider=provider, model_key=model_key, json_mode=True)
+    try:
+        return parse_review(response, num_questions), response
+    except ValueError:
+        pass
+    candidates.append((_lenient_review(response, num_questions), response))
+    candidates = [(review, text) for review, text in candidates if review is not None]
+    if not candidates:
+        return None, response
+    return max(candidates, key=lambda candidate: len(candidate[0]["interview_questions"]))
+
+def format_review_feedback(review):
+    """The review's feedback in the STRENGTHS/WEAKNESSES/SUGGESTIONS layout of the reports."""
+    blocks = []
+    for title, field in (("STRENGTHS", "strengths"), ("WEAKNESSES", "weaknesses"), ("SUGGESTIONS", "suggestions")):
+        items = review[field] or ["None noted"]
+        blocks.append(f"{title}:\n" + "\n".join(f"- {item}" for item in items))
+    return "\n\n".join(blocks)
+
+def format_interview_questions(review):
+    return "\n".join(f"{i}. {q}" for i, q in enumerate(review["interview_questions"], 1))
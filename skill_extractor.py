@@ -1,4 +1,8 @@
-import spacy
+import os
+import sys
+import json
+import time
+import subprocess
 
 # Predefined dictionary of high-confidence AI/ML/tech skills
 SKILL_LIST = [
@@ -8,25 +12,139 @@ SKILL_LIST = [
     "llm", "git", "ci/cd", "html", "css", "javascript", "power bi", "excel", "rest api", "flask", "django"
 ]
 
-nlp = spacy.load("en_core_web_lg")  # load Spacy model once
+# Alternate spellings/abbreviations -> canonical skill name
+SKILL_ALIASES = {
+    "k8s": "kubernetes",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "hugging face": "huggingface",
+    "amazon web services": "aws",
+    "google cloud": "gcp",
+    "google cloud platform": "gcp",
+    "microsoft azure": "azure",
+    "js": "javascript",
+    "cpp": "c++",
+    "html5": "html",
+    "css3": "css",
+    "powerbi": "power bi",
+    "ms excel": "excel",
+    "restful api": "rest api",
+    "rest apis": "rest api",
+    "cicd": "ci/cd",
+    "ci cd": "ci/cd",
+    "llms": "llm",
+    "large language model": "llm",
+    "large language models": "llm",
+    "natural language processing": "nlp",
+}
 
-def extract_skills(text, custom_skills=SKILL_LIST):
+# Model size -> spaCy package ("blank" is the English tokenizer only, no trained pipeline)
+NLP_MODELS = {
+    "blank": None,
+    "sm": "en_core_web_sm",
+    "md": "en_core_web_md",
+    "lg": "en_core_web_lg",
+}
+# Skill matching only needs the tokenizer, so trained components are not loaded at all
+UNUSED_COMPONENTS = ["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"]
+
+DEFAULT_NLP_MODEL = os.getenv("SPACY_MODEL", "blank")
+
+# Loaded pipelines, one per model size (loaded on first use, not at import)
+_nlp = {}
+# Compiled matchers, one per (model size, vocabulary, aliases) combination
+_matchers = {}
+
+def get_nlp(model_size=None):
+    """Get or lazily load the spaCy pipeline for model_size (blank/sm/md/lg, default SPACY_MODEL)."""
+    model_size = model_size or DEFAULT_NLP_MODEL
+    if model_size not in NLP_MODELS:
+        raise ValueError(f"Unknown spaCy model size '{model_size}'. Choose from: {list(NLP_MODELS)}")
+    if model_size not in _nlp:
+        import spacy  # deferred: importing spaCy alone costs seconds
+        package = NLP_MODELS[model_size]
+        _nlp[model_size] = spacy.blank("en") if package is None else spacy.load(package, exclude=UNUSED_COMPONENTS)
+    return _nlp[model_size]
+
+def build_skill_matcher(skills=SKILL_LIST, aliases=SKILL_ALIASES, model_size=None):
+    """
+    Compile a token-level PhraseMatcher over the skill vocabulary and its aliases.
+    Matching is case-insensitive and whole-token, so "java" does not fire inside
+    "javascript"; lookup cost does not grow with the number of skills.
+    """
+    model_size = model_size or DEFAULT_NLP_MODEL
+    key = (model_size, tuple(skills), tuple(sorted(aliases.items())))
+    if key not in _matchers:
+        from spacy.matcher import PhraseMatcher
+        nlp = get_nlp(model_size)
+        canonical = {skill.lower() for skill in skills}
+        terms = {skill: skill for skill in canonical}
+        terms.update({
+            alias.lower(): target.lower() for alias, target in aliases.items()
+            if target.lower() in canonical
+        })
+        matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        for term, target in terms.items():
+            matcher.add(target, [nlp.make_doc(term)])
+        _matchers[key] = matcher
+    return _matchers[key]
+
+def extract_skills(text, custom_skills=SKILL_LIST, aliases=SKILL_ALIASES, model_size=None):
     """
     Extract skills/technologies from text using matching against a curated list.
-    Returns a set of found skills (case-insensitive).
+    Returns a set of found skills (canonical lower-case names).
     """
-    text_lower = text.lower()
-    doc = nlp(text_lower)
-    found_skills = set()
-
-    # Token based matches
-    for skill in custom_skills:
-        skill_term = skill.lower()
-        # Check for whole word/phrase in text
-        if skill_term in text_lower:
-            found_skills.add(skill_term)
-        # Check for multi-token phrase in noun chunks
-        for chunk in doc.noun_chunks:
-            if skill_term in chunk.text.lower():
-                found_skills.add(skill_term)
-    return found_skills
+    nlp = get_nlp(model_size)
+    matcher = build_skill_matcher(custom_skills, aliases, model_size)
+    doc = nlp.make_doc(text)  # tokenizer only, no tagging/parsing needed
+    return {nlp.vocab.strings[match_id] for match_id, _, _ in matcher(doc)}
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _report_nlp_load(model_size):
+    """Runs inside a fresh interpreter: load one pipeline and print timing/memory as JSON."""
+    start = time.perf_counter()
+    get_nlp(model_size)
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    extract_skills("Python, SQL and k8s experience", model_size=model_size)
+    first_call_seconds = time.perf_counter() - start
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "first_call_seconds": first_call_seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+    }))
+
+def profile_nlp_models(model_sizes=tuple(NLP_MODELS)):
+    """
+    Measure startup time and resident memory for each model size, each in its own
+    interpreter so earlier loads don't skew the numbers. Returns {size: stats or error}.
+    """
+    results = {}
+    here = os.path.dirname(os.path.abspath(__file__))
+    for size in model_sizes:
+        proc = subprocess.run(
+            [sys.executable, "-c", f"import skill_extractor; skill_extractor._report_nlp_load({size!r})"],
+            cwd=here, capture_output=True, text=True,
+        )
+        if proc.returncode == 0:
+            results[size] = json.loads(proc.stdout.strip().splitlines()[-1])
+        else:
+            results[size] = {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return results
+
+if __name__ == "__main__":
+    print(f"{'model':<8}{'load (s)':>10}{'1st call (s)':>14}{'peak RSS (MB)':>15}")
+    for size, stats in profile_nlp_models().items():
+        if "error" in stats:
+            print(f"{size:<8}  not available: {stats['error']}")
+            continue
+        rss = f"{stats['peak_rss_mb']:.0f}" if stats["peak_rss_mb"] is not None else "n/a"
+        print(f"{size:<8}{stats['load_seconds']:>10.2f}{stats['first_call_seconds']:>14.3f}{rss:>15}")
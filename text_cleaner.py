@@ -54,6 +54,45 @@ def extract_sections(text):
         sections[header] = content
     return sections
 
+def split_passages(text, max_chars=480):
+    """
+    Splits cleaned text into short passages (about max_chars each) that never cross a
+    section boundary. Returns a list of {"section": name, "text": passage} in document order.
+    """
+    # Same split as extract_sections, but keeping text before the first header and
+    # repeated headers (extract_sections keeps only the last one)
+    parts = re.split(r"=== ([A-Z\s]+) ===", text)
+    blocks = [("", parts[0])] + [
+        (parts[i].strip().lower(), parts[i+1] if (i+1) < len(parts) else "")
+        for i in range(1, len(parts), 2)
+    ]
+    passages = []
+    for section, content in blocks:
+        current = []
+        size = 0
+        for line in content.split("\n"):
+            line = line.strip()
+            if not line or set(line) == {"="}:  # leftover header markers
+                continue
+            # Break up very long lines on word boundaries
+            while len(line) > max_chars:
+                cut = line.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                if current:
+                    passages.append({"section": section, "text": "\n".join(current)})
+                    current, size = [], 0
+                passages.append({"section": section, "text": line[:cut].strip()})
+                line = line[cut:].strip()
+            if current and size + len(line) > max_chars:
+                passages.append({"section": section, "text": "\n".join(current)})
+                current, size = [], 0
+            if line:
+                current.append(line)
+                size += len(line) + 1
+        if current:
+            passages.append({"section": section, "text": "\n".join(current)})
+    return passages
+
 # Example usage
 if __name__ == "__main__":
     dummy_resume = """
@@ -1,26 +1,67 @@
-import matplotlib.pyplot as plt
+import io
+import threading
+import matplotlib
+matplotlib.use("Agg")  # headless: charts are only ever rendered to buffers
+from matplotlib.figure import Figure
 from matplotlib_venn import venn2
-import os
+
+# One reusable figure per chart kind (cleared between charts), guarded for threaded callers
+_figures = {}
+_lock = threading.Lock()
+
+def _figure(kind, figsize):
+    if kind not in _figures:
+        fig = Figure(figsize=figsize)
+        fig.add_subplot()
+        _figures[kind] = fig
+    return _figures[kind]
+
+def _to_bytes(fig, fmt):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+def render_skill_venn(skills_resume, skills_jd, fmt="png"):
+    """Skill overlap Venn diagram as image bytes (png, svg, ...)."""
+    with _lock:
+        fig = _figure("venn", (5, 5))
+        ax = fig.axes[0]
+        ax.clear()
+        venn2([set(skills_resume), set(skills_jd)], set_labels=("Resume", "Job Description"), ax=ax)
+        ax.set_title("Skills Overlap: Resume vs JD")
+        fig.tight_layout()
+        return _to_bytes(fig, fmt)
+
+def render_skill_bar(skills_resume, skills_jd, fmt="png"):
+    """Matched/missing/extra skill counts as a bar chart, as image bytes."""
+    matched = set(skills_resume).intersection(set(skills_jd))
+    missing = set(skills_jd) - set(skills_resume)
+    extra = set(skills_resume) - set(skills_jd)
+    with _lock:
+        fig = _figure("bar", (6, 4))
+        ax = fig.axes[0]
+        ax.clear()
+        ax.bar(['Matched', 'Missing', 'Extra'], [len(matched), len(missing), len(extra)], color=['green', 'red', 'orange'])
+        ax.set_title('Skill Gap Analysis')
+        ax.set_ylabel('Number of Skills')
+        fig.tight_layout()
+        return _to_bytes(fig, fmt)
+
+def render_skill_charts(skills_resume, skills_jd, fmt="png"):
+    """Both report charts in memory: {"venn": bytes, "bar": bytes}."""
+    return {
+        "venn": render_skill_venn(skills_resume, skills_jd, fmt),
+        "bar": render_skill_bar(skills_resume, skills_jd, fmt),
+    }
 
 def save_skill_venn(skills_resume, skills_jd, out_path):
-    plt.figure(figsize=(5, 5))
-    venn_diagram = venn2([set(skills_resume), set(skills_jd)], set_labels=("Resume", "Job Description"))
-    plt.title("Skills Overlap: Resume vs JD")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    plt.close()
+    with open(out_path, "wb") as f:
+        f.write(render_skill_venn(skills_resume, skills_jd, fmt=out_path.rsplit(".", 1)[-1]))
 
 def save_skill_bar(skills_resume, skills_jd, out_path):
+    with open(out_path, "wb") as f:
+        f.write(render_skill_bar(skills_resume, skills_jd, fmt=out_path.rsplit(".", 1)[-1]))
     matched = set(skills_resume).intersection(set(skills_jd))
     missing = set(skills_jd) - set(skills_resume)
     extra = set(skills_resume) - set(skills_jd)
-    categories = ['Matched', 'Missing', 'Extra']
-    values = [len(matched), len(missing), len(extra)]
-    plt.figure(figsize=(6, 4))
-    plt.bar(categories, values, color=['green', 'red', 'orange'])
-    plt.title('Skill Gap Analysis')
-    plt.ylabel('Number of Skills')
-    plt.tight_layout()
-    plt.savefig(out_path)
-    plt.close()
     return matched, missing, extra